@@ -0,0 +1,49 @@
+from argparse import ArgumentParser
+from time import perf_counter
+
+from convex_hull import HULL_METHODS, compute_hull
+from generate import generate_random_points
+
+SIZES = [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+# Divide and conquer takes ~20 s at 10^6 points; skip it beyond this many
+DC_MAX_POINTS = 10 ** 6
+
+
+def main(sizes: list[int], distribution: str, methods: list[str], dc_max_points: int):
+    print(f'{"points":>10}{"generate":>10}' + ''.join(f'{method:>10}' for method in methods) + '  hull')
+    for size in sizes:
+        start = perf_counter()
+        points = generate_random_points(distribution, size, 312)
+        generate_seconds = perf_counter() - start
+
+        times = {}
+        hulls = {}
+        for method in methods:
+            if method == 'dc' and size > dc_max_points:
+                continue
+            # compute_hull sorts in place for 'dc'; give every method the same unsorted input
+            copy = list(points)
+            start = perf_counter()
+            hulls[method] = compute_hull(copy, method)
+            times[method] = perf_counter() - start
+        first = next(iter(hulls.values()))
+        assert all(hull == first for hull in hulls.values()), 'hulls differ between the methods'
+
+        print(f'{size:>10}{generate_seconds:>10.2f}'
+              + ''.join(f'{times[method]:>10.3f}' if method in times else f'{"-":>10}' for method in methods)
+              + f'  {len(first)}')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Time each compute_hull method over point counts')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Point counts')
+    parser.add_argument('-d', '--dist', '--distribution', default='uniform',
+                        help='The distribution from which to generate points')
+    parser.add_argument('--methods', nargs='+', default=list(HULL_METHODS), choices=list(HULL_METHODS),
+                        help='Hull methods to compare')
+    parser.add_argument('--dc-max-points', type=int, default=DC_MAX_POINTS,
+                        help='Skip divide and conquer above this many points')
+    args = parser.parse_args()
+
+    main(args.sizes, args.dist, args.methods, args.dc_max_points)
@@ -2,6 +2,11 @@
 # you debug your algorithm
 # from plotting import draw_line, draw_hull, circle_point
 import sys
+from array import array
+from itertools import chain
+
+import numpy as np
+
 import plotting as plot
 #Code for our data structure
 class Node:
@@ -247,9 +252,97 @@ def compute_hull_dc(points: list[tuple[float, float]]) -> list[tuple[float, floa
     # merging/tangent stuff
     return merge(left, right)
 
+def interior_mask(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Points strictly inside the polygon of the extreme points in 8 directions (Akl-Toussaint),
+    which can't be on the hull; a small margin keeps points within rounding error of an edge
+    """
+    corners = []
+    # counter-clockwise: right, upper right, top, ... lower right
+    for dx, dy in [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]:
+        corner = int(np.argmax(dx * xs + dy * ys))
+        if not corners or (xs[corner], ys[corner]) != (xs[corners[-1]], ys[corners[-1]]):
+            corners.append(corner)
+    if (xs[corners[0]], ys[corners[0]]) == (xs[corners[-1]], ys[corners[-1]]):
+        corners.pop()
+
+    inside = np.full(len(xs), len(corners) >= 3)
+    margin = 1e-12 * max(np.ptp(xs), np.ptp(ys)) ** 2
+    for start, end in zip(corners, corners[1:] + corners[:1]):
+        # the inside is to the left of each edge
+        ox, oy = xs[start], ys[start]
+        inside &= (xs[end] - ox) * (ys - oy) - (ys[end] - oy) * (xs - ox) > margin
+    return inside
+
+
+def compute_hull_monotone(points: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    """
+    Andrew's monotone chain over the points sorted by (x, y): the upper hull from left to right,
+    then the lower hull back, each an index stack in an array, popping the last point while it
+    doesn't make a right turn. Points that can't be on the hull are filtered out with NumPy first,
+    so only the rest are sorted and walked.
+    Returns the hull in compute_hull_dc's order: clockwise from the leftmost point
+    (the highest of them, if several share the smallest x).
+    """
+    if len(points) < 3:
+        return _from_upper_left(sorted(set(points)))
+
+    coordinates = np.fromiter(chain.from_iterable(points), dtype=np.float64, count=2 * len(points))
+    xs, ys = coordinates[0::2], coordinates[1::2]
+    candidates = np.flatnonzero(~interior_mask(xs, ys))
+    order = candidates[np.lexsort((ys[candidates], xs[candidates]))]
+    # drop repeated points, which are next to each other once sorted
+    distinct = np.ones(len(order), dtype=bool)
+    distinct[1:] = (np.diff(xs[order]) != 0) | (np.diff(ys[order]) != 0)
+    order = order[distinct]
+    if len(order) < 3:
+        return _from_upper_left([points[i] for i in order])
+    xs = xs[order].tolist()
+    ys = ys[order].tolist()
+
+    n = len(xs)
+    stack = array('l', bytes(array('l').itemsize * (2 * n)))
+    top = 0
+    # upper hull left to right, then lower hull right to left; the lower one stops above the upper's end
+    for lower, indices in enumerate((range(n), range(n - 2, -1, -1))):
+        floor = top if lower else 1
+        for i in indices:
+            x, y = xs[i], ys[i]
+            while top > floor and (xs[stack[top - 1]] - xs[stack[top - 2]]) * (y - ys[stack[top - 2]]) \
+                    - (ys[stack[top - 1]] - ys[stack[top - 2]]) * (x - xs[stack[top - 2]]) >= 0:
+                top -= 1
+            stack[top] = i
+            top += 1
+
+    # the lower hull ends back at the leftmost point
+    return _from_upper_left([points[order[i]] for i in stack[:top - 1]])
+
+
+def _from_upper_left(hull: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    """Rotate a clockwise hull to start at its leftmost point with the largest y"""
+    start = min(range(len(hull)), key=lambda i: (hull[i][0], -hull[i][1]))
+    return hull[start:] + hull[:start]
+
+
+# method= names for compute_hull
+HULL_METHODS = {
+    'dc': compute_hull_dc,
+    'monotone': compute_hull_monotone,
+}
+
+
 #Actual function
-def compute_hull(points: list[tuple[float, float]]) -> list[tuple[float, float]]:
-    """Return the subset of provided points that define the convex hull"""
+def compute_hull(points: list[tuple[float, float]], method: str = 'dc') -> list[tuple[float, float]]:
+    """
+    Return the subset of provided points that define the convex hull,
+    clockwise from the leftmost point.
+    `method` picks the engine from HULL_METHODS: 'dc' (divide and conquer, sorting points in place)
+    or 'monotone' (monotone chain on NumPy arrays, much faster on large inputs; points is left as is)
+    """
+    if method not in HULL_METHODS:
+        raise ValueError(f'Unknown hull method {method!r}; expected one of {", ".join(HULL_METHODS)}')
+    if method == 'monotone':
+        return compute_hull_monotone(points)
     #Greater than three points, do below
     points.sort()
     return compute_hull_dc(points)
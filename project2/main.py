@@ -3,11 +3,11 @@ import numpy as np
 from time import time
 
 from generate import generate_random_points
-from convex_hull import compute_hull
+from convex_hull import HULL_METHODS, compute_hull
 from plotting import plot_points, draw_hull, title, show_plot, draw_line
 
 
-def main(n: int, distribution: str, seed: int | None):
+def main(n: int, distribution: str, seed: int | None, method: str = 'dc'):
 
     points = generate_random_points(distribution, n, seed)
     plot_points(points)
@@ -48,7 +48,7 @@ def main(n: int, distribution: str, seed: int | None):
     print("Average: " + str(helper / 5) + " seconds")"""
 
     start = time()
-    hull_points = compute_hull(points)
+    hull_points = compute_hull(points, method)
     end = time()
 
     draw_hull(hull_points)
@@ -70,6 +70,7 @@ if __name__ == '__main__':
                         default='uniform'
                         )
     parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--method', default='dc', choices=list(HULL_METHODS), help='Hull algorithm')
     parser.add_argument('--debug', action='store_true', help='Turn on debug plotting')
     args = parser.parse_args()
 
@@ -82,4 +83,4 @@ if __name__ == '__main__':
         plt.switch_backend('Qt5Agg')
         plt.ion()
 
-    main(args.n, args.dist, args.seed)
+    main(args.n, args.dist, args.seed, args.method)
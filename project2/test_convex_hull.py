@@ -32,3 +32,25 @@ def test_guassian_distribution_large():
     points = generate_random_points('guassian', 20000, 312)
     candidate_hull = compute_hull(points)
     assert is_convex_hull(candidate_hull, points)
+
+
+@max_score(5)
+def test_monotone_chain():
+    for distribution in ['uniform', 'guassian', 'circle']:
+        for n in [3, 10, 1000, 20000]:
+            points = generate_random_points(distribution, n, 312)
+            candidate_hull = compute_hull(list(points), method='monotone')
+            assert is_convex_hull(candidate_hull, points)
+            assert candidate_hull == compute_hull(points)
+
+    # integer points sharing the smallest x start from the highest of them, as with divide and conquer
+    for points in [[(0, 0), (0, 1), (1, 0), (1, 1)], [(0, 0), (0, 2), (2, 0), (2, 2), (1, 1)]]:
+        candidate_hull = compute_hull(list(points), method='monotone')
+        assert is_convex_hull(candidate_hull, points)
+        assert candidate_hull == compute_hull(points)
+    assert compute_hull([(0, 0), (0, 1), (1, 0), (1, 1)], method='monotone') == [(0, 1), (1, 1), (1, 0), (0, 0)]
+
+    # repeated points give each hull vertex once, however many copies there are
+    for copies in [1, 2, 3, 10]:
+        assert compute_hull([(2, 3)] * copies, method='monotone') == [(2, 3)]
+    assert compute_hull([(0, 0), (1, 1)] * 3, method='monotone') == [(0, 0), (1, 1)]
@@ -0,0 +1,85 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from graphs import CSRGraph
+from network_routing import shortest_path_tree
+
+# Sources handed to a worker at a time
+CHUNK_SOURCES = 16
+
+
+def all_pairs_shortest_paths(graph, sources=None, workers: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    shortest_path_tree from every source (default: every node) across a pool of processes.
+    The graph's CSR arrays and the result matrices live in shared memory: workers map the graph
+    read-only instead of each unpickling a copy, and write their rows of the results in place.
+    :param graph: either graph form, or a CSRGraph
+    :param sources: the source nodes; row i of the results is sources[i]
+    :param workers: number of worker processes; None uses every CPU, 1 runs in this process
+    :return: dist and prev matrices, one row per source; network_routing.tree_path(dist[i], prev[i], target)
+        reconstructs a path when it is needed
+    """
+    graph = CSRGraph.from_graph(graph)
+    sources = list(range(len(graph)) if sources is None else sources)
+    shape = (len(sources), len(graph))
+
+    if workers == 1:
+        dist = np.empty(shape)
+        prev = np.empty(shape, dtype=np.int32)
+        for row, source in enumerate(sources):
+            dist[row], prev[row] = shortest_path_tree(graph, source)
+        return dist, prev
+
+    arrays = {
+        'offsets': graph.offsets,
+        'targets': graph.targets,
+        'weights': graph.weights,
+        'dist': np.empty(shape),
+        'prev': np.empty(shape, dtype=np.int32),
+    }
+    blocks = {}
+    try:
+        layout = {}
+        for name, array in arrays.items():
+            blocks[name] = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            layout[name] = (blocks[name].name, array.shape, array.dtype.str)
+            if name not in ('dist', 'prev'):
+                _view(blocks[name], array.shape, array.dtype)[...] = array
+
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(layout,)) as pool:
+            chunks = [(row, sources[row:row + CHUNK_SOURCES]) for row in range(0, len(sources), CHUNK_SOURCES)]
+            for future in [pool.submit(_trees, first_row, chunk) for first_row, chunk in chunks]:
+                future.result()
+
+        return (_view(blocks['dist'], shape, np.float64).copy(),
+                _view(blocks['prev'], shape, np.int32).copy())
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+
+def _view(block: shared_memory.SharedMemory, shape, dtype) -> np.ndarray:
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+# The worker's views of the shared arrays, set up once per process by _attach
+_shared = {}
+
+
+def _attach(layout: dict):
+    for name, (block_name, shape, dtype) in layout.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _shared[name] = (block, _view(block, shape, np.dtype(dtype)))
+
+
+def _trees(first_row: int, sources: list[int]):
+    graph = CSRGraph(_shared['offsets'][1], _shared['targets'][1], _shared['weights'][1])
+    dist = _shared['dist'][1]
+    prev = _shared['prev'][1]
+    for row, source in enumerate(sources, start=first_row):
+        dist[row], prev[row] = shortest_path_tree(graph, source)
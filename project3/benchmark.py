@@ -0,0 +1,392 @@
+import csv
+import json
+import math
+import platform
+import random
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from contraction import ContractionHierarchy
+from generation import generate_csr_graph
+from graphs import CSRGraph, dict_graph_nbytes, reverse_graph
+from instrumentation import collect_stats
+from main import generate_graph
+from network_routing import find_shortest_path_bidirectional, find_shortest_path_lazy, find_shortest_path_with_heap
+from priorityqueues import PRIORITY_QUEUES
+
+SIZES = [250, 1000, 2000]
+DENSITIES = [0.01, 0.05, 0.2, 0.5, 1.0]
+
+# The linear queue is O(n) per pop; skip it beyond this many nodes
+LINEAR_MAX_SIZE = 2000
+
+SUITE_SIZES = [100, 1_000, 10_000, 100_000]
+SUITE_DENSITIES = [0.001, 0.01, 0.1]
+# Suite graphs with more edges than this are skipped (10^7 edges is ~120 MB as a CSRGraph)
+SUITE_MAX_EDGES = 10 ** 7
+
+# A case regresses when a metric grows by more than the threshold fraction plus this much;
+# the allowance for seconds is scaled to the case instead, by the spread of its timed runs (see regressions)
+DEFAULT_THRESHOLD = 0.25
+NOISE = {'peak_memory_mb': 0.5, 'relaxations': 0}
+DEFAULT_REPEAT = 5
+# Each timed run answers the queries as many times as it takes to last this long
+MIN_RUN_SECONDS = 0.1
+
+
+def time_queries(graph, queries: list[tuple[int, int]], pq) -> float:
+    """
+    Seconds to answer every (source, target) query with the given priority queue;
+    'lazy' is find_shortest_path_lazy's heapq with lazy deletion
+    """
+    start = perf_counter()
+    for source, target in queries:
+        if pq == 'lazy':
+            find_shortest_path_lazy(graph, source, target)
+        else:
+            find_shortest_path_with_heap(graph, source, target, pq=pq)
+    return perf_counter() - start
+
+
+def main(sizes: list[int], densities: list[float], pqs: list[str], query_count: int):
+    print(f'{"nodes":>6}{"density":>9}{"edges":>10}' + ''.join(f'{pq:>10}' for pq in pqs) + '   fastest')
+    for size in sizes:
+        for density in densities:
+            _, graph = generate_graph(312, size, density, 0.05)
+            edges = sum(len(neighbors) for neighbors in graph.values())
+            # Far-apart ids, so most queries settle a good part of the graph
+            queries = [(i, size - 1 - i) for i in range(query_count)]
+
+            times = {}
+            for pq in pqs:
+                if pq == 'linear' and size > LINEAR_MAX_SIZE:
+                    continue
+                times[pq] = time_queries(graph, queries, pq)
+
+            print(f'{size:>6}{density:>9}{edges:>10}'
+                  + ''.join(f'{times[pq]:>10.4f}' if pq in times else f'{"-":>10}' for pq in pqs)
+                  + f'   {min(times, key=times.get)}')
+
+
+def suite_cases(sizes: list[int], densities: list[float]):
+    """(name, size, density) for every suite graph with at least one and at most SUITE_MAX_EDGES edges per node"""
+    for size in sizes:
+        for density in densities:
+            edges = size * int(round((size - 1) * density))
+            if 0 < edges <= SUITE_MAX_EDGES:
+                yield f'n{size}_d{density}', size, density
+
+
+def measure(graph: CSRGraph, queries: list[tuple[int, int]], pq: str, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Time the queries with pq, then run them once more, instrumented and under tracemalloc
+    for the peak memory; the counting and tracing are kept out of the timed runs.
+    Like timeit, each timed run repeats the queries until it lasts MIN_RUN_SECONDS, so short cases
+    aren't lost in timer and scheduling noise; seconds is the best of repeat runs (per pass over the queries)
+    and seconds_spread how far their median was above it, as a fraction
+    """
+    def timed_run(passes):
+        start = perf_counter()
+        for _ in range(passes):
+            for source, target in queries:
+                find_shortest_path_with_heap(graph, source, target, pq=pq)
+        return perf_counter() - start
+
+    passes = 1
+    while (elapsed := timed_run(passes)) < MIN_RUN_SECONDS:
+        passes = max(passes * 2, math.ceil(passes * MIN_RUN_SECONDS / max(elapsed, 1e-9)))
+    runs = sorted([elapsed] + [timed_run(passes) for _ in range(repeat - 1)])
+    seconds = runs[0] / passes
+    spread = runs[len(runs) // 2] / runs[0] - 1
+
+    tracemalloc.start()
+    try:
+        with collect_stats() as stats:
+            costs = [find_shortest_path_with_heap(graph, source, target, pq=pq)[1] for source, target in queries]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'nodes': len(graph),
+        'edges': graph.edge_count,
+        'pq': pq,
+        'seconds': seconds,
+        'seconds_per_query': seconds / len(queries),
+        'seconds_spread': spread,
+        'settled': stats.pops,
+        'relaxations': stats.relaxations,
+        'decrease_keys': stats.decrease_keys,
+        'sift_swaps': stats.sift_swaps,
+        'peak_memory_mb': peak / 2 ** 20,
+        'costs': costs,
+    }
+
+
+def _measure_case(size: int, density: float, query_count: int, pq: str, repeat: int) -> dict:
+    _, graph = generate_csr_graph(312, size, density, 0.05)
+    rng = random.Random(312)
+    queries = [(rng.randrange(size), rng.randrange(size)) for _ in range(query_count)]
+    return measure(graph, queries, pq, repeat)
+
+
+def fit_complexity(results: dict) -> dict:
+    """
+    For each queue, the least-squares fit of seconds = coefficient * (nodes + edges) ** exponent
+    over the suite's cases (a straight line on a log-log plot)
+    """
+    fits = {}
+    for pq in dict.fromkeys(result['pq'] for result in results.values()):
+        points = [(result['nodes'] + result['edges'], result['seconds'])
+                  for result in results.values() if result['pq'] == pq and result['seconds'] > 0]
+        if len(points) < 2:
+            continue
+        exponent, intercept = np.polyfit(*np.log(np.array(points)).T, 1)
+        fits[pq] = {'exponent': float(exponent), 'coefficient': float(np.exp(intercept))}
+    return fits
+
+
+def run_suite(sizes: list[int], densities: list[float], pqs: list[str], query_count: int,
+              repeat: int = DEFAULT_REPEAT) -> dict:
+    """Measure every queue on every suite graph, printing each as it finishes; returns the JSON report"""
+    print(f'{"case":<20}{"pq":<9}{"seconds":>9}{"settled":>10}{"relaxations":>13}{"decrease-keys":>15}'
+          f'{"sift swaps":>12}{"peak MB":>9}')
+    results = {}
+    for name, size, density in suite_cases(sizes, densities):
+        for pq in pqs:
+            if pq == 'linear' and size > LINEAR_MAX_SIZE:
+                continue
+            # a fresh process per measurement, so earlier cases' garbage and warmed-up code don't skew it
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(_measure_case, size, density, query_count, pq, repeat).result()
+            results[f'{name}/{pq}'] = result
+            print(f'{name:<20}{pq:<9}{result["seconds"]:>9.3f}{result["settled"]:>10}{result["relaxations"]:>13}'
+                  f'{result["decrease_keys"]:>15}{result["sift_swaps"]:>12}{result["peak_memory_mb"]:>9.1f}')
+
+    fits = fit_complexity(results)
+    for pq, fit in fits.items():
+        print(f'{pq}: seconds ~ {fit["coefficient"]:.3g} * (nodes + edges) ^ {fit["exponent"]:.2f}')
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'queries': query_count,
+        'repeat': repeat,
+        'results': results,
+        'fits': fits,
+    }
+
+
+def regressions(report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Descriptions of every case whose time, peak memory or relaxations exceed the baseline's
+    by more than threshold (a fraction, plus NOISE), or whose path costs differ;
+    cases missing from either report are skipped.
+    Times are allowed the larger of the two runs' seconds_spread on top of the threshold
+    """
+    problems = []
+    for name, result in report['results'].items():
+        if (expected := baseline['results'].get(name)) is None:
+            continue
+        if result['costs'] != expected['costs']:
+            problems.append(f'{name}: path costs differ from the baseline')
+
+        spread = max(result['seconds_spread'], expected['seconds_spread'])
+        if result['seconds'] > expected['seconds'] * (1 + threshold + spread):
+            problems.append(f'{name}: seconds {result["seconds"]:.3f} vs baseline {expected["seconds"]:.3f} '
+                            f'({_increase(result["seconds"], expected["seconds"])})')
+        for metric, noise in NOISE.items():
+            if result[metric] > expected[metric] * (1 + threshold) + noise:
+                problems.append(f'{name}: {metric} {result[metric]:.3f} vs baseline {expected[metric]:.3f} '
+                                f'({_increase(result[metric], expected[metric])})')
+    return problems
+
+
+def _increase(value: float, baseline: float) -> str:
+    """value's increase over baseline as a percentage, or as a difference when baseline is 0"""
+    if baseline == 0:
+        return f'+{value - baseline:.3f}'
+    return f'+{value / baseline - 1:.0%}'
+
+
+def write_report(report: dict, report_file: Path):
+    """Write report as JSON; an unreachable target's cost, inf, becomes null since JSON can't represent it"""
+    results = {name: {**result, 'costs': [None if cost == math.inf else cost for cost in result['costs']]}
+               for name, result in report['results'].items()}
+    report_file.write_text(json.dumps({**report, 'results': results}, indent=2, allow_nan=False) + '\n')
+
+
+def read_report(report_file: Path) -> dict:
+    """A report written by write_report, with null costs back as inf"""
+    report = json.loads(report_file.read_text())
+    for result in report['results'].values():
+        result['costs'] = [math.inf if cost is None else cost for cost in result['costs']]
+    return report
+
+
+def write_csv(report: dict, csv_file: Path):
+    """One row per case and queue, without the per-query costs"""
+    columns = ['case', 'pq', 'nodes', 'edges', 'seconds', 'seconds_per_query', 'seconds_spread',
+               'settled', 'relaxations', 'decrease_keys', 'sift_swaps', 'peak_memory_mb']
+    with open(csv_file, 'w', newline='') as file:
+        writer = csv.DictWriter(file, columns, extrasaction='ignore')
+        writer.writeheader()
+        for name, result in report['results'].items():
+            writer.writerow({'case': name.split('/')[0], **result})
+
+
+def plot_suite(report: dict, plot_file: Path):
+    """Log-log seconds against nodes + edges for each queue, with its fitted curve"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    for pq, fit in report['fits'].items():
+        points = sorted((result['nodes'] + result['edges'], result['seconds'])
+                        for result in report['results'].values() if result['pq'] == pq)
+        sizes = np.array([size for size, _ in points])
+        line = ax.loglog(sizes, [seconds for _, seconds in points], 'o', label=f'{pq} (^{fit["exponent"]:.2f})')
+        ax.loglog(sizes, fit['coefficient'] * sizes ** fit['exponent'], '-', color=line[0].get_color())
+    ax.set_xlabel('nodes + edges')
+    ax.set_ylabel(f'seconds for {report["queries"]} queries')
+    ax.legend()
+    fig.savefig(plot_file)
+
+
+def suite_main(sizes: list[int], densities: list[float], pqs: list[str], query_count: int, repeat: int,
+               report_file: Path | None, csv_file: Path | None, plot_file: Path | None,
+               baseline_file: Path | None, threshold: float) -> int:
+    """Run the suite, write its reports, and compare it to the baseline; returns the exit status"""
+    report = run_suite(sizes, densities, pqs, query_count, repeat)
+    if report_file:
+        write_report(report, report_file)
+    if csv_file:
+        write_csv(report, csv_file)
+    if plot_file:
+        plot_suite(report, plot_file)
+
+    if baseline_file:
+        problems = regressions(report, read_report(baseline_file), threshold)
+        for problem in problems:
+            print(f'REGRESSION {problem}')
+        if problems:
+            return 1
+        print(f'No regressions beyond {threshold:.0%} of {baseline_file}')
+    return 0
+
+
+def memory(sizes: list[int], densities: list[float]):
+    """Print the memory of each generated graph as dict-of-dicts and as a CSRGraph"""
+    print(f'{"nodes":>6}{"density":>9}{"edges":>10}{"dict MB":>10}{"CSR MB":>10}{"ratio":>8}')
+    for size in sizes:
+        for density in densities:
+            _, graph = generate_graph(312, size, density, 0.05)
+            dict_bytes = dict_graph_nbytes(graph)
+            csr = CSRGraph.from_dict(graph)
+            print(f'{size:>6}{density:>9}{csr.edge_count:>10}{dict_bytes / 2 ** 20:>10.1f}'
+                  f'{csr.nbytes / 2 ** 20:>10.1f}{dict_bytes / csr.nbytes:>8.1f}')
+
+
+def geometric_graph(seed: int, size: int, neighbors: int = 4, noise: float = 0.1) -> tuple[
+    list[tuple[float, float]],
+    dict[int, dict[int, float]]
+]:
+    """
+    Road-like graph: random points, each joined both ways to its nearest neighbours,
+    with weights up to noise longer than the straight line.
+    generate_graph's edges go to random nodes anywhere, which makes an expander
+    that no hierarchy can shortcut cheaply; this is the kind of graph contraction hierarchies are for.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-1, 1, (size, 2))
+    graph = {u: {} for u in range(size)}
+
+    # distances a block of rows at a time, ~10^7 at once
+    block_rows = max(1, 10 ** 7 // size)
+    for start in range(0, size, block_rows):
+        block = positions[start:start + block_rows]
+        distances = np.hypot(block[:, None, 0] - positions[None, :, 0], block[:, None, 1] - positions[None, :, 1])
+        nearest = np.argpartition(distances, neighbors, axis=1)[:, :neighbors + 1]
+        for row, targets in enumerate(nearest.tolist()):
+            u = start + row
+            for v in targets:
+                if v != u:
+                    graph[u][v] = graph[v][u] = float(distances[row, v]) * (1 + rng.uniform(0, noise))
+
+    return [tuple(p) for p in positions.tolist()], graph
+
+
+def contraction(sizes: list[int], query_count: int):
+    """Print contraction hierarchy preprocessing time, index size and query latency on geometric graphs"""
+    print(f'{"nodes":>7}{"edges":>9}{"build s":>9}{"shortcuts":>11}{"index MB":>10}'
+          f'{"heap ms":>9}{"bidir ms":>10}{"CH ms":>8}')
+    for size in sizes:
+        _, graph = geometric_graph(312, size)
+        start = perf_counter()
+        hierarchy = ContractionHierarchy.build(graph)
+        build_seconds = perf_counter() - start
+        index_bytes = (dict_graph_nbytes(dict(enumerate(hierarchy.upward)))
+                       + dict_graph_nbytes(dict(enumerate(hierarchy.downward)))
+                       + sys.getsizeof(hierarchy.middle) + sys.getsizeof(hierarchy.rank))
+
+        rng = random.Random(312)
+        queries = [(rng.randrange(size), rng.randrange(size)) for _ in range(query_count)]
+        reverse = reverse_graph(graph)
+        latencies = []
+        answers = []
+        for finder in [lambda s, t: find_shortest_path_with_heap(graph, s, t),
+                       lambda s, t: find_shortest_path_bidirectional(graph, s, t, reverse)[:2],
+                       hierarchy.find_shortest_path]:
+            start = perf_counter()
+            answers.append([finder(source, target) for source, target in queries])
+            latencies.append((perf_counter() - start) / query_count * 1000)
+        assert answers[0] == answers[1] == answers[2], 'paths differ between the searches'
+
+        print(f'{size:>7}{sum(map(len, graph.values())):>9}{build_seconds:>9.2f}{hierarchy.shortcut_count:>11}'
+              f'{index_bytes / 2 ** 20:>10.1f}' + ''.join(f'{ms:>{w}.3f}' for ms, w in zip(latencies, [9, 10, 8])))
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Time Dijkstra with each priority queue over graph sizes and densities, '
+                                        'or (--suite) measure its scaling against a baseline')
+    parser.add_argument('--sizes', type=int, nargs='+', help=f'Node counts (default {SIZES}, suite {SUITE_SIZES})')
+    parser.add_argument('--densities', type=float, nargs='+',
+                        help=f'Fractions of possible edges (default {DENSITIES}, suite {SUITE_DENSITIES})')
+    parser.add_argument('--pqs', nargs='+', default=[*PRIORITY_QUEUES, 'lazy'], choices=[*PRIORITY_QUEUES, 'lazy'],
+                        help='Priority queues to compare')
+    parser.add_argument('--queries', type=int, default=5, help='Shortest-path queries per graph')
+    parser.add_argument('--memory', action='store_true', help='Compare dict and CSR graph memory instead')
+    parser.add_argument('--contraction', action='store_true',
+                        help='Contraction hierarchy build time, size and query latency on geometric graphs of --sizes')
+    suite_args = parser.add_argument_group('suite')
+    suite_args.add_argument('--suite', action='store_true',
+                            help='Run the scaling suite on CSR graphs, counting each search\'s work')
+    suite_args.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                            help=f'Timed runs per case; the fastest is kept (default {DEFAULT_REPEAT})')
+    suite_args.add_argument('--report', type=Path, help='Write the JSON report here (use it as a later --baseline)')
+    suite_args.add_argument('--csv', type=Path, help='Write the results as CSV here')
+    suite_args.add_argument('--plot', type=Path, help='Save a log-log plot of the timings and fits here')
+    suite_args.add_argument('--baseline', type=Path, help='Fail if a case regresses against this report')
+    suite_args.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help=f'Allowed growth as a fraction (default {DEFAULT_THRESHOLD})')
+    args = parser.parse_args()
+
+    if args.suite:
+        pqs = [pq for pq in args.pqs if pq != 'lazy']
+        sys.exit(suite_main(args.sizes or SUITE_SIZES, args.densities or SUITE_DENSITIES, pqs, args.queries,
+                            args.repeat, args.report, args.csv, args.plot, args.baseline, args.threshold))
+    args.sizes = args.sizes or SIZES
+    args.densities = args.densities or DENSITIES
+    if args.memory:
+        memory(args.sizes, args.densities)
+    elif args.contraction:
+        contraction(args.sizes, args.queries)
+    else:
+        main(args.sizes, args.densities, args.pqs, args.queries)
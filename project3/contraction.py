@@ -0,0 +1,214 @@
+import heapq
+from math import inf as INF
+
+from graphs import edges_of
+
+# A witness search gives up (and the shortcut is added) after settling this many nodes
+WITNESS_SETTLE_LIMIT = 100
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchy over a static graph, for fast repeated shortest-path queries.
+
+    Preprocessing contracts the nodes one at a time in order of importance (their rank):
+    removing node v, a shortcut u -> x of weight w(u, v) + w(v, x) is added for every pair of
+    neighbours whose shortest path went through v, unless a witness search finds another path
+    no longer than it. Every shortest path then has an equally short version that climbs in rank
+    and then descends, so a query only searches upward from both ends.
+
+    upward[u] holds the edges u -> x with rank[x] > rank[u], and downward[x] the edges
+    u -> x with rank[u] > rank[x] (keyed by u), both shortcuts and original edges;
+    middle[(u, x)] is the contracted node a shortcut skips.
+    """
+
+    def __init__(self, rank: list[int], upward: list[dict[int, float]], downward: list[dict[int, float]],
+                 middle: dict[tuple[int, int], int]):
+        self.rank = rank
+        self.upward = upward
+        self.downward = downward
+        self.middle = middle
+
+    @classmethod
+    def build(cls, graph) -> 'ContractionHierarchy':
+        """
+        Contract every node of graph (either form, or a CSRGraph).
+        Nodes are ordered by edge difference (shortcuts added minus edges removed) plus the number
+        of neighbours already contracted, which spreads the contractions over the graph.
+        Priorities are updated lazily: a popped node is re-evaluated and pushed back
+        if it is no longer the cheapest.
+        """
+        edges = edges_of(graph)
+        node_count = len(graph)
+        out_edges = [{} for _ in range(node_count)]
+        in_edges = [{} for _ in range(node_count)]
+        for u in range(node_count):
+            for x, weight in edges(u):
+                if x != u:
+                    out_edges[u][x] = weight
+                    in_edges[x][u] = weight
+
+        rank = [0] * node_count
+        upward = [{} for _ in range(node_count)]
+        downward = [{} for _ in range(node_count)]
+        middle = {}
+        contracted_neighbors = [0] * node_count
+
+        def priority(v):
+            shortcuts = _shortcuts(v, out_edges, in_edges)
+            return len(shortcuts) - len(in_edges[v]) - len(out_edges[v]) + contracted_neighbors[v]
+
+        queue = [(priority(v), v) for v in range(node_count)]
+        heapq.heapify(queue)
+        next_rank = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            current = priority(v)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+
+            rank[v] = next_rank
+            next_rank += 1
+            for u, x, weight in _shortcuts(v, out_edges, in_edges):
+                out_edges[u][x] = weight
+                in_edges[x][u] = weight
+                middle[(u, x)] = v
+
+            # v's remaining edges all lead to nodes contracted later, so they point up the hierarchy
+            upward[v] = out_edges[v]
+            downward[v] = in_edges[v]
+            for x in out_edges[v]:
+                del in_edges[x][v]
+                contracted_neighbors[x] += 1
+            for u in in_edges[v]:
+                del out_edges[u][v]
+                contracted_neighbors[u] += 1
+            out_edges[v] = {}
+            in_edges[v] = {}
+
+        return cls(rank, upward, downward, middle)
+
+    @property
+    def edge_count(self) -> int:
+        """Edges in the hierarchy, shortcuts included"""
+        return sum(map(len, self.upward)) + sum(map(len, self.downward))
+
+    @property
+    def shortcut_count(self) -> int:
+        return len(self.middle)
+
+    def find_shortest_path(self, source: int, target: int) -> tuple[list[int], float]:
+        """
+        Bidirectional Dijkstra that only follows upward edges from the source and
+        (reversed) downward edges from the target; each side stops once its smallest key
+        is no better than the best meeting found. The meeting node's two half-paths are
+        joined and every shortcut unpacked into the original nodes.
+        Return the same (path, cost) as network_routing.find_shortest_path_with_heap.
+        """
+        if source == target:
+            return [source], 0
+
+        edges = (self.upward, self.downward)
+        dist = ({source: 0}, {target: 0})
+        prev = ({source: None}, {target: None})
+        H = ([(0, source)], [(0, target)])
+
+        best = INF
+        meeting = None
+        while H[0] or H[1]:
+            side = 0 if H[0] and (not H[1] or H[0][0][0] <= H[1][0][0]) else 1
+            d, u = heapq.heappop(H[side])
+            if d >= best:
+                H[side].clear()
+                continue
+            if d > dist[side][u]:
+                continue
+
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best = d + other
+                meeting = u
+
+            here = dist[side]
+            for edge, weight in edges[side][u].items():
+                new_dist = d + weight
+                if new_dist < here.get(edge, INF):
+                    here[edge] = new_dist
+                    prev[side][edge] = u
+                    heapq.heappush(H[side], (new_dist, edge))
+
+        if meeting is None:
+            return [target], INF
+
+        hops = []
+        helper = meeting
+        while helper is not None:
+            hops.append(helper)
+            helper = prev[0][helper]
+        hops.reverse()
+        helper = prev[1][meeting]
+        while helper is not None:
+            hops.append(helper)
+            helper = prev[1][helper]
+
+        path = [source]
+        for a, b in zip(hops, hops[1:]):
+            self._unpack(a, b, path)
+
+        # Sum the original edges in path order, so the cost matches the other searches to the last bit
+        cost = 0
+        for a, b in zip(path, path[1:]):
+            cost += self._weight(a, b)
+        return path, cost
+
+    def _unpack(self, first: int, last: int, path: list[int]):
+        """Append the original nodes after `first` up to `last` of the hierarchy edge first -> last"""
+        stack = [(first, last)]
+        while stack:
+            a, b = stack.pop()
+            skipped = self.middle.get((a, b))
+            if skipped is None:
+                path.append(b)
+            else:
+                stack.append((skipped, b))
+                stack.append((a, skipped))
+
+    def _weight(self, a: int, b: int) -> float:
+        if self.rank[b] > self.rank[a]:
+            return self.upward[a][b]
+        return self.downward[b][a]
+
+
+def _shortcuts(v: int, out_edges: list[dict], in_edges: list[dict]) -> list[tuple[int, int, float]]:
+    """(u, x, weight) for each shortcut contracting v would need, given the remaining graph"""
+    shortcuts = []
+    for u, weight_in in in_edges[v].items():
+        needed = {x: weight_in + weight_out for x, weight_out in out_edges[v].items() if x != u}
+        if not needed:
+            continue
+        witness = _witness_distances(u, v, max(needed.values()), out_edges)
+        for x, weight in needed.items():
+            if witness.get(x, INF) > weight and out_edges[u].get(x, INF) > weight:
+                shortcuts.append((u, x, weight))
+    return shortcuts
+
+
+def _witness_distances(source: int, avoid: int, limit: float, out_edges: list[dict]) -> dict[int, float]:
+    """Distances from source in the remaining graph without `avoid`, up to limit (and WITNESS_SETTLE_LIMIT nodes)"""
+    dist = {source: 0}
+    H = [(0, source)]
+    settled = 0
+    while H and settled < WITNESS_SETTLE_LIMIT:
+        d, u = heapq.heappop(H)
+        if d > dist[u]:
+            continue
+        if d > limit:
+            break
+        settled += 1
+        for x, weight in out_edges[u].items():
+            new_dist = d + weight
+            if x != avoid and new_dist < dist.get(x, INF):
+                dist[x] = new_dist
+                heapq.heappush(H, (new_dist, x))
+    return dist
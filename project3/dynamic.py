@@ -0,0 +1,116 @@
+import heapq
+from math import inf as INF
+
+from graphs import edges_of
+from network_routing import shortest_path_tree, tree_path
+
+
+class DynamicShortestPathTree:
+    """
+    Shortest paths from one source that stay correct while edge weights change,
+    repaired after each batch of changes instead of recomputed (after Ramalingam and Reps).
+
+    A weight increase on an edge outside the tree changes nothing. On a tree edge u -> v it can only
+    lengthen the paths through v, so just v's subtree is reset, each of its nodes starting from
+    its best edge out of the rest of the tree, and a Dijkstra over the subtree settles them.
+    A decrease on u -> v can only shorten paths through v: if it beats dist[v], v starts a
+    Dijkstra that stops wherever the new distances are no improvement.
+    Both kinds in one batch share a single Dijkstra.
+    Adding an edge is a decrease from INF, and removing one an increase to INF.
+    """
+
+    def __init__(self, graph, source: int):
+        """Copy graph (either form, or a CSRGraph) and compute the tree from source"""
+        edges = edges_of(graph)
+        self.source = source
+        self.graph = {u: {v: weight for v, weight in edges(u) if weight != INF} for u in range(len(graph))}
+        self.reverse = {u: {} for u in self.graph}
+        for u, neighbors in self.graph.items():
+            for v, weight in neighbors.items():
+                self.reverse[v][u] = weight
+
+        dist, prev = shortest_path_tree(self.graph, source)
+        self.dist = dist.tolist()
+        self.prev = prev.tolist()
+        self.children = [set() for _ in self.graph]
+        for v, u in enumerate(self.prev):
+            if u != -1:
+                self.children[u].add(v)
+
+    def weight(self, u: int, v: int) -> float:
+        return self.graph[u].get(v, INF)
+
+    def update(self, u: int, v: int, weight: float) -> int:
+        """Set the weight of u -> v (INF removes it) and repair the tree; see update_many"""
+        return self.update_many([(u, v, weight)])
+
+    def update_many(self, changes: list[tuple[int, int, float]]) -> int:
+        """
+        Apply every (u, v, weight) change (INF removes the edge; a later change to the same edge wins),
+        then repair the tree once. Return the number of nodes whose distance had to be recomputed.
+        """
+        old_weights = {}
+        for u, v, weight in changes:
+            old_weights.setdefault((u, v), self.weight(u, v))
+            if weight == INF:
+                self.graph[u].pop(v, None)
+                self.reverse[v].pop(u, None)
+            else:
+                self.graph[u][v] = self.reverse[v][u] = weight
+
+        dist, prev = self.dist, self.prev
+        increased = [(u, v) for (u, v), old in old_weights.items() if self.weight(u, v) > old and prev[v] == u]
+        decreased = [(u, v) for (u, v), old in old_weights.items() if self.weight(u, v) < old]
+
+        # every node under a lengthened tree edge loses its distance
+        affected = set()
+        stack = [v for _, v in increased]
+        while stack:
+            v = stack.pop()
+            if v not in affected:
+                affected.add(v)
+                stack.extend(self.children[v])
+        for v in affected:
+            dist[v] = INF
+            self._set_prev(v, -1)
+
+        H = []
+        for v in affected:
+            for u, weight in self.reverse[v].items():
+                if u not in affected and dist[u] + weight < dist[v]:
+                    dist[v] = dist[u] + weight
+                    self._set_prev(v, u)
+            if dist[v] != INF:
+                H.append((dist[v], v))
+        heapq.heapify(H)
+
+        for u, v in decreased:
+            if dist[u] + self.weight(u, v) < dist[v]:
+                dist[v] = dist[u] + self.weight(u, v)
+                self._set_prev(v, u)
+                heapq.heappush(H, (dist[v], v))
+
+        repaired = set(affected)
+        while H:
+            d, u = heapq.heappop(H)
+            if d > dist[u]:
+                continue
+            repaired.add(u)
+            for v, weight in self.graph[u].items():
+                if d + weight < dist[v]:
+                    dist[v] = d + weight
+                    self._set_prev(v, u)
+                    heapq.heappush(H, (dist[v], v))
+
+        return len(repaired)
+
+    def path(self, target: int) -> tuple[list[int], float]:
+        """(path, cost) from the source to target, like network_routing.find_shortest_path_with_heap"""
+        return tree_path(self.dist, self.prev, target)
+
+    def _set_prev(self, v: int, u: int):
+        if self.prev[v] != -1:
+            self.children[self.prev[v]].discard(v)
+        self.prev[v] = u
+        if u != -1:
+            self.children[u].add(v)
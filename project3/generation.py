@@ -0,0 +1,95 @@
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from graphs import CSRGraph
+
+# Rows of targets sampled per NumPy call, to bound the temporary arrays on large graphs
+SAMPLE_CELLS = 2 ** 22
+
+
+def generate_csr_graph(
+        seed: int,
+        size: int,
+        density: float,
+        noise: float,
+        exact: bool = False,
+        cache_dir: Path | str | None = None
+) -> tuple[np.ndarray, CSRGraph]:
+    """
+    The random graphs of main.generate_graph, built straight into a CSRGraph:
+    `size` positions uniform in [-1, 1]^2, and from each node edges to round((size - 1) * density)
+    distinct nodes sampled uniformly (self-loops included, as in main), weighing the Euclidean distance
+    plus N(0, noise) clipped at 0 (or uniform in [0, 1) with noise == -1).
+
+    By default the sampling is vectorized with a NumPy Generator: the same distribution,
+    but not the same graph as main.generate_graph for a seed. With exact, main.generate_graph itself
+    is run and converted, so the graph is bit-identical to the one the tests use.
+
+    With cache_dir, the graph is saved under a directory named by its parameters the first time
+    and memory-mapped from there on later calls.
+
+    Return the (size, 2) positions and the graph.
+    """
+    if cache_dir is not None:
+        directory = Path(cache_dir) / f'{seed}_{size}_{density}_{noise}{"_exact" if exact else ""}'
+        if directory.exists():
+            return np.load(directory / 'positions.npy', mmap_mode='r'), CSRGraph.load(directory)
+
+        positions, graph = generate_csr_graph(seed, size, density, noise, exact)
+        # Write next to the final directory and rename it into place, so readers never see half a graph
+        partial = directory.with_name(f'{directory.name}.{os.getpid()}.tmp')
+        graph.save(partial)
+        np.save(partial / 'positions.npy', positions)
+        try:
+            partial.rename(directory)
+        except OSError:
+            # another process cached the same graph first
+            shutil.rmtree(partial)
+        return np.load(directory / 'positions.npy', mmap_mode='r'), CSRGraph.load(directory)
+
+    if exact:
+        from main import generate_graph
+        positions, graph = generate_graph(seed, size, density, noise)
+        return np.array(positions, dtype=np.float64).reshape(size, 2), CSRGraph.from_dict(graph)
+
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-1, 1, (size, 2))
+    edges_per_node = int(round((size - 1) * density))
+
+    targets = np.empty((size, edges_per_node), dtype=np.int32)
+    rows = max(1, SAMPLE_CELLS // max(size, 1))
+    for start in range(0, size, rows):
+        targets[start:start + rows] = _sample_rows(rng, min(rows, size - start), size, edges_per_node)
+    targets = targets.ravel()
+
+    if noise == -1:
+        weights = rng.random(len(targets))
+    else:
+        sources = np.repeat(np.arange(size), edges_per_node)
+        weights = np.hypot(*(positions[targets] - positions[sources]).T)
+        if noise:
+            weights = np.maximum(0.0, weights + rng.normal(0, noise, len(targets)))
+
+    offsets = np.arange(size + 1, dtype=np.int32) * edges_per_node
+    return positions, CSRGraph(offsets, targets, weights)
+
+
+def _sample_rows(rng: np.random.Generator, rows: int, size: int, count: int) -> np.ndarray:
+    """`rows` independent samples of `count` distinct nodes out of `size`, one per row"""
+    if count == 0:
+        return np.empty((rows, 0), dtype=np.int32)
+    if count > size // 4:
+        # dense: the nodes with the `count` smallest random keys
+        return np.argpartition(rng.random((rows, size)), count - 1, axis=1)[:, :count]
+
+    # sparse: draw with replacement and redraw the repeats until each row is distinct
+    sample = rng.integers(0, size, (rows, count))
+    while True:
+        sample.sort(axis=1)
+        repeats = sample[:, 1:] == sample[:, :-1]
+        if not repeats.any():
+            return sample
+        sample[:, 1:][repeats] = rng.integers(0, size, int(repeats.sum()))
@@ -0,0 +1,128 @@
+import sys
+from itertools import chain
+from math import inf as INF
+from pathlib import Path
+
+import numpy as np
+
+
+class CSRGraph:
+    """
+    Directed weighted graph in compressed sparse row form:
+    the edges leaving node u are targets[offsets[u]:offsets[u + 1]]
+    with the matching weights, so the whole graph is three flat arrays
+    (int32 offsets and targets, float64 weights) instead of a dict per node.
+    Nodes are 0..node_count-1.
+    """
+
+    FILES = ('offsets.npy', 'targets.npy', 'weights.npy')
+
+    def __init__(self, offsets: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        if len(targets) != len(weights) or offsets[-1] != len(targets):
+            raise ValueError('offsets, targets and weights describe different numbers of edges')
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @classmethod
+    def from_dict(cls, graph: dict[int, dict[int, float]]) -> 'CSRGraph':
+        """Convert the {source: {target: weight}} form from main.generate_graph"""
+        node_count = max(len(graph), max((v for edges in graph.values() for v in edges), default=-1) + 1)
+        rows = [graph.get(u, {}) for u in range(node_count)]
+        offsets = np.zeros(node_count + 1, dtype=np.int32)
+        np.cumsum([len(edges) for edges in rows], out=offsets[1:])
+
+        edge_count = int(offsets[-1])
+        targets = np.fromiter(chain.from_iterable(rows), dtype=np.int32, count=edge_count)
+        weights = np.fromiter(chain.from_iterable(edges.values() for edges in rows), dtype=np.float64, count=edge_count)
+        return cls(offsets, targets, weights)
+
+    @classmethod
+    def from_matrix(cls, matrix: list[list[float]]) -> 'CSRGraph':
+        """Convert an adjacency matrix, where matrix[u][v] is the weight of u -> v and INF (or None) is no edge"""
+        weights = np.array([[INF if w is None else w for w in row] for row in matrix], dtype=np.float64)
+        sources, targets = np.nonzero(weights != INF)
+        offsets = np.zeros(len(matrix) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(matrix)), out=offsets[1:])
+        return cls(offsets, targets.astype(np.int32), weights[sources, targets])
+
+    @classmethod
+    def from_graph(cls, graph) -> 'CSRGraph':
+        """Convert either form (a CSRGraph is returned as is)"""
+        if isinstance(graph, CSRGraph):
+            return graph
+        if isinstance(graph, dict):
+            return cls.from_dict(graph)
+        return cls.from_matrix(graph)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.targets.nbytes + self.weights.nbytes
+
+    def neighbors(self, u: int) -> tuple[np.ndarray, np.ndarray]:
+        """(targets, weights) of the edges leaving u, as views into the graph's arrays"""
+        start, end = self.offsets[u], self.offsets[u + 1]
+        return self.targets[start:end], self.weights[start:end]
+
+    def reverse(self) -> 'CSRGraph':
+        """The graph with every edge turned around"""
+        sources = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.offsets))
+        order = np.argsort(self.targets, kind='stable')
+        offsets = np.zeros(len(self) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self.targets, minlength=len(self)), out=offsets[1:])
+        return CSRGraph(offsets, sources[order], self.weights[order])
+
+    def save(self, directory: Path | str):
+        """Write the three arrays as .npy files in directory (created if needed)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in zip(self.FILES, (self.offsets, self.targets, self.weights)):
+            np.save(directory / name, array)
+
+    @classmethod
+    def load(cls, directory: Path | str, mmap: bool = True) -> 'CSRGraph':
+        """Read a graph written by save, memory-mapped read-only with mmap"""
+        directory = Path(directory)
+        return cls(*(np.load(directory / name, mmap_mode='r' if mmap else None) for name in cls.FILES))
+
+    def to_dict(self) -> dict[int, dict[int, float]]:
+        return {u: dict(zip(*(a.tolist() for a in self.neighbors(u)))) for u in range(len(self))}
+
+
+def dict_graph_nbytes(graph: dict[int, dict[int, float]]) -> int:
+    """
+    Approximate memory held by a {source: {target: weight}} graph: the dicts,
+    plus the float weights and target ints (small ints are shared by the interpreter, so not counted)
+    """
+    total = sys.getsizeof(graph)
+    for edges in graph.values():
+        total += sys.getsizeof(edges)
+        total += sum(sys.getsizeof(w) for w in edges.values())
+        total += sum(sys.getsizeof(v) for v in edges if v > 256)
+    return total
+
+
+def reverse_graph(graph):
+    """graph (a CSRGraph or {source: {target: weight}}) with every edge turned around, in the same form"""
+    if isinstance(graph, CSRGraph):
+        return graph.reverse()
+
+    reverse = {u: {} for u in graph}
+    for u, edges in graph.items():
+        for v, weight in edges.items():
+            reverse.setdefault(v, {})[u] = weight
+    return reverse
+
+
+def edges_of(graph):
+    """A function giving the (target, weight) pairs leaving a node of graph, in either form"""
+    if isinstance(graph, CSRGraph):
+        return lambda u: zip(*(a.tolist() for a in graph.neighbors(u)))
+    return lambda u: graph.get(u, {}).items()
@@ -0,0 +1,68 @@
+"""
+Heuristics for network_routing.find_shortest_path_astar: callables giving
+a lower bound on the cost from a node to the target, heuristic(node, target).
+
+A* only returns shortest paths if the heuristic never overestimates (admissible),
+and since settled nodes are never reopened it needs the stronger consistency:
+heuristic(u, t) <= weight(u, v) + heuristic(v, t) for every edge u -> v.
+
+Euclidean distance is consistent when every edge weighs at least the distance between
+its ends, as with main.generate_graph(noise=0). With noise > 0 each weight is
+max(0, distance + N(0, noise)), so about half the edges are shorter than the straight line
+(and very short ones drop to 0), and the plain Euclidean heuristic can overestimate.
+Scaling it by admissible_scale(graph, positions), the smallest weight / distance ratio over all edges,
+makes it consistent again, at the cost of guiding the search less (a scale of 0 is plain Dijkstra).
+With noise == -1 the weights are random and unrelated to the positions.
+"""
+
+import math
+
+import numpy as np
+
+from graphs import edges_of
+
+
+def zero_heuristic(node: int, target: int) -> float:
+    """No guidance: A* with this heuristic is Dijkstra"""
+    return 0
+
+
+def euclidean_heuristic(positions: list[tuple[float, float]], scale: float = 1.0):
+    """Straight-line distance between the nodes' positions, times scale"""
+    def heuristic(node: int, target: int) -> float:
+        return scale * math.dist(positions[node], positions[target])
+
+    return heuristic
+
+
+def admissible_scale(graph, positions: list[tuple[float, float]]) -> float:
+    """The largest scale for which euclidean_heuristic is consistent on graph: min over edges of weight / distance"""
+    edges = edges_of(graph)
+    scale = 1.0
+    for u in range(len(positions)):
+        for v, weight in edges(u):
+            distance = math.dist(positions[u], positions[v])
+            if distance > 0:
+                scale = min(scale, weight / distance)
+    return max(scale, 0.0)
+
+
+def landmark_heuristic(from_landmarks: np.ndarray, to_landmarks: np.ndarray):
+    """
+    Triangle-inequality (ALT) bounds from precomputed landmark distances:
+    from_landmarks[i, v] = d(landmark i, v) and to_landmarks[i, v] = d(v, landmark i).
+    For each landmark L, d(u, t) >= d(L, t) - d(L, u) and d(u, t) >= d(u, L) - d(t, L);
+    the heuristic is the largest of these bounds. Pairs involving unreachable (inf) distances are skipped.
+    """
+    # node-major copies, so each lookup reads one contiguous row
+    from_nodes = np.ascontiguousarray(from_landmarks.T)
+    to_nodes = np.ascontiguousarray(to_landmarks.T)
+
+    def heuristic(node: int, target: int) -> float:
+        with np.errstate(invalid='ignore'):
+            behind = from_nodes[target] - from_nodes[node]
+            ahead = to_nodes[node] - to_nodes[target]
+        # fmax ignores the nan of inf - inf
+        return float(np.fmax.reduce(np.fmax(behind, ahead), initial=0.0))
+
+    return heuristic
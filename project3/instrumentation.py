@@ -0,0 +1,119 @@
+"""
+Counters for the work a shortest-path search does, for finding out why a query is slow.
+
+Pass instrument=True to network_routing.find_shortest_path_with_heap (or _with_array)
+to get a SearchStats back with the path, or total every search in a block with
+
+    with collect_stats() as stats:
+        ...
+    print(stats)
+
+Searches that are not being instrumented run the uncounted code, so they pay nothing for this.
+"""
+
+import dataclasses
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+
+from priorityqueues import HeapPQ, PairingHeapPQ
+
+PHASES = ('setup', 'search', 'path')
+
+
+@dataclasses.dataclass
+class SearchStats:
+    """
+    Work done by one search, or the total over several (searches counts them).
+    sift_swaps counts the slots items moved through the array heaps' sifts
+    (heapifying included), or the links made by the pairing heap's melds.
+    Every queue starts out holding all the nodes, so max_queue_size is the node count.
+    seconds splits the time into setup (dist/prev and the queue), search and path (walking prev back).
+    """
+    searches: int = 0
+    pops: int = 0
+    relaxations: int = 0
+    decrease_keys: int = 0
+    sift_swaps: int = 0
+    max_queue_size: int = 0
+    seconds: dict[str, float] = dataclasses.field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+
+    def add(self, other: 'SearchStats'):
+        """Add another search's counts into these"""
+        self.searches += other.searches
+        self.pops += other.pops
+        self.relaxations += other.relaxations
+        self.decrease_keys += other.decrease_keys
+        self.sift_swaps += other.sift_swaps
+        self.max_queue_size = max(self.max_queue_size, other.max_queue_size)
+        for phase, seconds in other.seconds.items():
+            self.seconds[phase] += seconds
+
+
+# The stats of the innermost enclosing collect_stats block, per thread (and asyncio task)
+_collecting: ContextVar[SearchStats | None] = ContextVar('collecting', default=None)
+
+
+@contextmanager
+def collect_stats():
+    """Instrument every search in the block, totalling their counts into the yielded SearchStats"""
+    stats = SearchStats()
+    token = _collecting.set(stats)
+    try:
+        yield stats
+    finally:
+        _collecting.reset(token)
+
+
+def active_stats() -> SearchStats | None:
+    """The SearchStats of the innermost collect_stats block, or None outside of one"""
+    return _collecting.get()
+
+
+@cache
+def counting_queue(pq_class):
+    """
+    Subclass of pq_class taking (distances, stats), which counts its sift moves (or pairing links)
+    into stats. There is one subclass per queue class, since every new class seen by the base
+    class's methods would cost the interpreter's specializations of them, in uncounted searches too.
+    """
+    if issubclass(pq_class, HeapPQ):
+        class CountingQueue(pq_class):
+            def percolate_upward(self, index):
+                key = self.keys[index]
+                super().percolate_upward(index)
+                self.stats.sift_swaps += _depth(index, self.arity) - _depth(self.positions[key], self.arity)
+
+            def percolate_downward(self, index):
+                key = self.keys[index]
+                super().percolate_downward(index)
+                self.stats.sift_swaps += _depth(self.positions[key], self.arity) - _depth(index, self.arity)
+
+    elif issubclass(pq_class, PairingHeapPQ):
+        class CountingQueue(pq_class):
+            def meld(self, first, second):
+                if first != -1 and second != -1:
+                    self.stats.sift_swaps += 1
+                return super().meld(first, second)
+
+    else:
+        class CountingQueue(pq_class):
+            pass
+
+    def __init__(self, distances, stats: SearchStats):
+        # set first: heapifying in pq_class.__init__ sifts
+        self.stats = stats
+        pq_class.__init__(self, distances)
+
+    CountingQueue.__init__ = __init__
+    CountingQueue.__name__ = CountingQueue.__qualname__ = f'Counting{pq_class.__name__}'
+    return CountingQueue
+
+
+def _depth(index: int, arity: int) -> int:
+    """Level of a heap slot (the root is 0)"""
+    depth = 0
+    while index > 0:
+        index = (index - 1) // arity
+        depth += 1
+    return depth
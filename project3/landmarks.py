@@ -0,0 +1,81 @@
+from math import inf as INF
+from pathlib import Path
+
+import numpy as np
+
+from graphs import CSRGraph, reverse_graph
+from heuristics import landmark_heuristic
+from network_routing import shortest_path_tree
+
+
+def shortest_distances(graph: CSRGraph, source: int) -> np.ndarray:
+    """Distance from source to every node (inf if unreachable)"""
+    dist, _ = shortest_path_tree(graph, source)
+    return dist
+
+
+class LandmarkIndex:
+    """
+    ALT preprocessing for repeated queries on one graph: a few landmarks and the
+    distances from and to each of them, from which landmark_heuristic bounds d(u, t) for any pair.
+    The distance tables are node-major, from_landmarks[v, i] = d(landmark i, v) and
+    to_landmarks[v, i] = d(v, landmark i), so a query reads one row per node
+    and the tables can be used straight from a memory-mapped file.
+    """
+
+    FILES = ('landmarks.npy', 'from_landmarks.npy', 'to_landmarks.npy')
+
+    def __init__(self, landmarks: np.ndarray, from_landmarks: np.ndarray, to_landmarks: np.ndarray):
+        self.landmarks = landmarks
+        self.from_landmarks = from_landmarks
+        self.to_landmarks = to_landmarks
+
+    @classmethod
+    def build(cls, graph, landmark_count: int = 8, first: int = 0) -> 'LandmarkIndex':
+        """
+        Pick landmarks by farthest-point selection and run a full Dijkstra from and to each.
+        The first landmark is the node farthest from `first`; each next one is the node whose nearest
+        landmark is farthest away, so the landmarks spread around the edge of the graph,
+        where they give the tightest bounds. Unreachable nodes are never picked.
+        """
+        graph = CSRGraph.from_graph(graph)
+        reverse = reverse_graph(graph)
+
+        landmarks = []
+        from_landmarks = []
+        to_landmarks = []
+        nearest = shortest_distances(graph, first)
+        while len(landmarks) < min(landmark_count, len(graph)):
+            reachable = np.where(nearest == INF, -1, nearest)
+            landmark = int(np.argmax(reachable))
+            if reachable[landmark] <= 0 and landmarks:
+                # every reachable node is already a landmark
+                break
+
+            landmarks.append(landmark)
+            from_landmarks.append(shortest_distances(graph, landmark))
+            to_landmarks.append(shortest_distances(reverse, landmark))
+            nearest = from_landmarks[-1] if len(landmarks) == 1 else np.minimum(nearest, from_landmarks[-1])
+
+        return cls(np.array(landmarks, dtype=np.int32),
+                   np.stack(from_landmarks, axis=1), np.stack(to_landmarks, axis=1))
+
+    def heuristic(self):
+        """landmark_heuristic over this index, for network_routing.find_shortest_path_astar"""
+        return landmark_heuristic(self.from_landmarks.T, self.to_landmarks.T)
+
+    def save(self, directory: Path | str):
+        """Write the index as .npy files in directory (created if needed)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in zip(self.FILES, (self.landmarks, self.from_landmarks, self.to_landmarks)):
+            np.save(directory / name, np.ascontiguousarray(array))
+
+    @classmethod
+    def load(cls, directory: Path | str, mmap: bool = True) -> 'LandmarkIndex':
+        """
+        Read an index written by save. With mmap the tables are memory-mapped read-only,
+        so loading is instant and worker processes share the pages
+        """
+        directory = Path(directory)
+        return cls(*(np.load(directory / name, mmap_mode='r' if mmap else None) for name in cls.FILES))
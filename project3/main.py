@@ -2,9 +2,8 @@ import argparse
 import math
 import random
 from math import inf
-from time import time
+from time import perf_counter, time
 
-from plotting import plot_points, draw_path, circle_point, title, show_plot, plot_weights
 from network_routing import find_shortest_path_with_array, find_shortest_path_with_heap
 
 
@@ -44,6 +43,9 @@ def generate_graph(seed, size, density, noise) -> tuple[
 
 
 def main(seed: int, size: int, density: float, noise: float, source: int, target: int):
+    # plotting loads matplotlib, which generate_graph's importers (tests, benchmark.py) don't need
+    from plotting import plot_points, draw_path, circle_point, title, show_plot, plot_weights
+
     start = time()
     positions, weights = generate_graph(seed, size, density, noise)
     end = time()
@@ -61,39 +63,27 @@ def main(seed: int, size: int, density: float, noise: float, source: int, target
     circle_point(positions[source], c='r')
     circle_point(positions[target], c='b')
 
-    sumHeap = 0
+    # For timings across sizes, densities and priority queues, run benchmark.py --suite
+    start = perf_counter()
     path, cost = find_shortest_path_with_heap(weights, source, target)
-    for i in range(5):
-        start = time()
-        path, cost = find_shortest_path_with_heap(weights, source, target)
-        end = time()
-        heap_time = end - start
-        print()
-        print('-- Heap --')
-        print('Path:', path)
-        print('Cost:', cost)
-        print('Time:', heap_time)
-        sumHeap += heap_time
-
-    print("Avg Time For Heap: " + str(round((sumHeap/5), 11)))
+    heap_time = perf_counter() - start
+    print()
+    print('-- Heap --')
+    print('Path:', path)
+    print('Cost:', cost)
+    print('Time:', heap_time)
 
     draw_path(positions, path, color = "red")
 
-    sumArray = 0
+    start = perf_counter()
     path, cost = find_shortest_path_with_array(weights, source, target)
-    for i in range(5):
-        start = time()
-        path, cost = find_shortest_path_with_array(weights, source, target)
-        end = time()
-        array_time = end - start
-        print()
-        print('-- Array --')
-        print('Path:', path)
-        print('Cost:', cost)
-        print('Time:', array_time)
-        sumArray += array_time
-
-    print("Avg Time For Array: " + str(round((sumArray/5), 11)))
+    array_time = perf_counter() - start
+    print()
+    print('-- Array --')
+    print('Path:', path)
+    print('Cost:', cost)
+    print('Time:', array_time)
+
     draw_path(positions, path, color = "green")
 
     title(f'Cost: {cost}, Heap: {round(heap_time, 4)}, Array: {round(array_time, 4)}')
@@ -131,6 +121,5 @@ if __name__ == '__main__':
 
     main(args.seed, args.n, args.density, args.noise, args.source, args.target)
 
-    # You can use a loop like the following to generate data for your tables:
-    # for n in [100, 200, 400, 800, 1600, 3200, 6400]:
-    #     main(312, n, 1, 0.05, 2, 9)
+    # To generate data for your tables, use the benchmark instead, e.g.
+    #     python benchmark.py --suite --sizes 100 200 400 800 1600 3200 6400 --densities 0.1 --csv table.csv
@@ -1,19 +1,39 @@
-from priorityqueues import LinearPQ, HeapPQ
+import heapq
+from time import perf_counter
+
+import numpy as np
+
+from graphs import CSRGraph, edges_of, reverse_graph
+from instrumentation import SearchStats, active_stats, counting_queue
+from priorityqueues import PRIORITY_QUEUES
 from math import inf as INF
 
 def find_shortest_path_with_heap(
         graph: list[list[float]],
         source: int,
-        target: int
-) -> tuple[list[int], float]:
+        target: int,
+        pq='heap',
+        instrument: bool = False
+) -> tuple[list[int], float] | tuple[list[int], float, SearchStats]:
     """
     Find the shortest (least-cost) path from `source` to `target` in `graph`
     using the heap-based algorithm.
 
+    `pq` picks the priority queue: a name from PRIORITY_QUEUES
+    ('linear', 'heap', 'dary', 'pairing') or any class taking the initial distances.
+
+    With `instrument`, the search's instrumentation.SearchStats is returned as a third value;
+    inside an instrumentation.collect_stats block every search is counted into the block's stats.
+
     Return:
         - the list of nodes (including `source` and `target`)
         - the cost of the path
     """
+    if instrument or active_stats() is not None:
+        return find_shortest_path_instrumented(graph, source, target, pq, instrument)
+    if isinstance(graph, CSRGraph):
+        return find_shortest_path_csr(graph, source, target, pq)
+
     dist = []
     prev = []
     for i in range(len(graph)):
@@ -21,23 +41,32 @@ def find_shortest_path_with_heap(
         prev.append(None)
     dist[source] = 0
 
-    H = HeapPQ(dist)
+    H = make_pq(pq, dist)
 
     return iterate_through(H, dist, prev, graph, target)
 
 def find_shortest_path_with_array(
         graph: list[list[float]],
         source: int,
-        target: int
-) -> tuple[list[int], float]:
+        target: int,
+        pq='linear',
+        instrument: bool = False
+) -> tuple[list[int], float] | tuple[list[int], float, SearchStats]:
     """
     Find the shortest (least-cost) path from `source` to `target` in `graph`
     using the array-based (linear lookup) algorithm.
 
+    `pq` and `instrument` are as in find_shortest_path_with_heap.
+
     Return:
         - the list of nodes (including `source` and `target`)
         - the cost of the path
     """
+    if instrument or active_stats() is not None:
+        return find_shortest_path_instrumented(graph, source, target, pq, instrument)
+    if isinstance(graph, CSRGraph):
+        return find_shortest_path_csr(graph, source, target, pq)
+
     dist = []
     prev = []
     for i in range(len(graph)):
@@ -45,10 +74,429 @@ def find_shortest_path_with_array(
         prev.append(None)
     dist[source] = 0
 
-    H = LinearPQ(dist)
+    H = make_pq(pq, dist)
 
     return iterate_through(H, dist, prev, graph, target)
 
+def find_shortest_path_csr(
+        graph: CSRGraph,
+        source: int,
+        target: int,
+        pq='heap'
+) -> tuple[list[int], float]:
+    """
+    Find the shortest (least-cost) path from `source` to `target` in a CSRGraph
+    (see CSRGraph.from_graph to convert the dict or matrix forms).
+    The edges of each settled node are relaxed together with NumPy on slices
+    of the graph's arrays; only improved neighbours go through the priority queue.
+    `pq` is as in find_shortest_path_with_heap; find_shortest_path_with_heap
+    and find_shortest_path_with_array call this when given a CSRGraph.
+
+    Return:
+        - the list of nodes (including `source` and `target`)
+        - the cost of the path
+    """
+    dist = np.full(len(graph), INF)
+    prev = np.full(len(graph), -1, dtype=np.int32)
+    dist[source] = 0
+
+    H = make_pq(pq, dist)
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+
+    while not H.is_empty():
+        u = H.pop_min()
+        if u == target or dist[u] == INF:
+            break
+
+        start, end = offsets[u], offsets[u + 1]
+        neighbors = targets[start:end]
+        candidates = dist[u] + weights[start:end]
+        better = candidates < dist[neighbors]
+        if not better.any():
+            continue
+
+        neighbors = neighbors[better]
+        candidates = candidates[better]
+        dist[neighbors] = candidates
+        prev[neighbors] = u
+        for edge, new_dist in zip(neighbors.tolist(), candidates.tolist()):
+            H.update_priority(edge, new_dist)
+
+    ans = []
+    helper = target
+    while helper != -1:
+        ans.append(helper)
+        helper = int(prev[helper])
+
+    return ans[::-1], float(dist[target])
+
+def shortest_path_tree(
+        graph,
+        source: int,
+        targets=None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Run Dijkstra from `source` over the whole graph (either form, or a CSRGraph,
+    which avoids converting it on every call) and keep the result:
+    dist[v] is the cost of the shortest path to v (INF if unreachable)
+    and prev[v] the node before v on it (-1 for the source and unreachable nodes).
+    Use tree_path for the path to any node.
+
+    With `targets`, the search stops as soon as every one of them is settled;
+    their entries are final, other nodes' may not be.
+    """
+    graph = CSRGraph.from_graph(graph)
+    dist = np.full(len(graph), INF)
+    prev = np.full(len(graph), -1, dtype=np.int32)
+    dist[source] = 0
+    remaining = None if targets is None else set(targets)
+    offsets, heads, weights = graph.offsets, graph.targets, graph.weights
+
+    H = [(0.0, source)]
+    while H:
+        d, u = heapq.heappop(H)
+        if d > dist[u]:
+            continue
+        if remaining is not None:
+            remaining.discard(u)
+            if not remaining:
+                break
+
+        start, end = offsets[u], offsets[u + 1]
+        neighbors = heads[start:end]
+        candidates = d + weights[start:end]
+        better = candidates < dist[neighbors]
+        if better.any():
+            neighbors = neighbors[better]
+            candidates = candidates[better]
+            dist[neighbors] = candidates
+            prev[neighbors] = u
+            for edge, new_dist in zip(neighbors.tolist(), candidates.tolist()):
+                heapq.heappush(H, (new_dist, edge))
+
+    return dist, prev
+
+def tree_path(dist: np.ndarray, prev: np.ndarray, target: int) -> tuple[list[int], float]:
+    """
+    The (path, cost) to `target` from a shortest_path_tree's dist/prev arrays,
+    walked back through prev only when asked for;
+    an unreachable target gives ([target], INF) like the other searches
+    """
+    ans = []
+    helper = target
+    while helper != -1:
+        ans.append(helper)
+        helper = int(prev[helper])
+
+    return ans[::-1], float(dist[target])
+
+def find_shortest_paths(
+        graph,
+        source: int,
+        targets: list[int]
+) -> dict[int, tuple[list[int], float]]:
+    """
+    Shortest (path, cost) from `source` to each of `targets` with one search,
+    which stops once all of them are settled
+    """
+    dist, prev = shortest_path_tree(graph, source, targets)
+    return {target: tree_path(dist, prev, target) for target in targets}
+
+def find_shortest_path_lazy(
+        graph: dict[int, dict[int, float]],
+        source: int,
+        target: int
+) -> tuple[list[int], float]:
+    """
+    Find the shortest (least-cost) path from `source` to `target` in `graph`
+    with the stdlib heapq and lazy deletion: each improvement pushes a new
+    (distance, node) entry, and entries for nodes already settled are skipped when popped.
+    Only nodes reached from `source` are ever touched (no O(n) setup),
+    so queries whose target is close to the source stay cheap on big graphs.
+
+    Return:
+        - the list of nodes (including `source` and `target`)
+        - the cost of the path
+    """
+    dist = {source: 0}
+    prev = {source: None}
+    settled = set()
+    H = [(0, source)]
+
+    while H:
+        d, u = heapq.heappop(H)
+        if u in settled:
+            continue
+        settled.add(u)
+
+        if u == target:
+            break
+        for edge, weight in graph[u].items():
+            new_dist = d + weight
+            if new_dist < dist.get(edge, INF):
+                dist[edge] = new_dist
+                prev[edge] = u
+                heapq.heappush(H, (new_dist, edge))
+
+    ans = []
+    helper = target
+    while helper is not None:
+        ans.append(helper)
+        helper = prev.get(helper)
+
+    return ans[::-1], dist.get(target, INF)
+
+def find_shortest_path_bidirectional(
+        graph,
+        source: int,
+        target: int,
+        reverse=None
+) -> tuple[list[int], float, int]:
+    """
+    Find the shortest (least-cost) path from `source` to `target` in `graph`
+    (either form, or a CSRGraph) by searching forward from `source` and backward
+    from `target` at the same time, always advancing the side whose next node is closer.
+    Each edge scanned that reaches a node labelled by the other side is a candidate
+    path; once the two smallest keys add up to at least the best candidate,
+    no shorter path can remain and the search stops.
+    Both searches together settle roughly the nodes within d(source, target) / 2
+    of either end, instead of all those within d(source, target) of the source.
+
+    `reverse` is `graph` with its edges turned around (graphs.reverse_graph);
+    pass it in when querying the same graph repeatedly, so it is only built once.
+
+    Return:
+        - the list of nodes (including `source` and `target`)
+        - the cost of the path
+        - the number of nodes settled by the two searches
+    """
+    if source == target:
+        return [source], 0, 1
+    if reverse is None:
+        reverse = reverse_graph(graph)
+
+    edges = (edges_of(graph), edges_of(reverse))
+    dist = ({source: 0}, {target: 0})
+    prev = ({source: None}, {target: None})
+    # weight of the edge to each node's prev, to re-add the cost in path order
+    via = ({}, {})
+    settled = (set(), set())
+    H = ([(0, source)], [(0, target)])
+
+    best = INF
+    meeting = None
+    while H[0] and H[1] and H[0][0][0] + H[1][0][0] < best:
+        side = 0 if H[0][0][0] <= H[1][0][0] else 1
+        d, u = heapq.heappop(H[side])
+        if u in settled[side]:
+            continue
+        settled[side].add(u)
+
+        here, there = dist[side], dist[1 - side]
+        for edge, weight in edges[side](u):
+            new_dist = d + weight
+            if new_dist < here.get(edge, INF):
+                here[edge] = new_dist
+                prev[side][edge] = u
+                via[side][edge] = weight
+                heapq.heappush(H[side], (new_dist, edge))
+            if edge in there and new_dist + there[edge] < best:
+                best = new_dist + there[edge]
+                # the edge in the original direction
+                meeting = (u, edge, weight) if side == 0 else (edge, u, weight)
+
+    settled_count = len(settled[0]) + len(settled[1])
+    if meeting is None:
+        return [target], INF, settled_count
+
+    # Sum the cost from source to target, so it matches the one-sided searches to the last bit
+    first, second, weight = meeting
+    ans = []
+    helper = first
+    while helper is not None:
+        ans.append(helper)
+        helper = prev[0][helper]
+    ans.reverse()
+
+    cost = dist[0][first] + weight
+    helper = second
+    while helper is not None:
+        ans.append(helper)
+        if prev[1][helper] is not None:
+            cost += via[1][helper]
+        helper = prev[1][helper]
+
+    return ans, cost, settled_count
+
+def find_shortest_path_astar(
+        graph,
+        source: int,
+        target: int,
+        heuristic,
+        pq='heap'
+) -> tuple[list[int], float, int]:
+    """
+    Find the shortest (least-cost) path from `source` to `target` in `graph`
+    (either form, or a CSRGraph) with A*: Dijkstra ordered by distance so far
+    plus heuristic(node, target), a lower bound on the distance left,
+    so nodes away from the target are settled later or never.
+    See heuristics.py for the heuristics (Euclidean, zero, landmark)
+    and when they are admissible; `pq` is as in find_shortest_path_with_heap.
+
+    Return:
+        - the list of nodes (including `source` and `target`)
+        - the cost of the path
+        - the number of nodes settled
+    """
+    dist = []
+    prev = []
+    for i in range(len(graph)):
+        dist.append(INF)
+        prev.append(None)
+    dist[source] = 0
+
+    priorities = list(dist)
+    priorities[source] = heuristic(source, target)
+    H = make_pq(pq, priorities)
+    edges = edges_of(graph)
+    # each node's heuristic, computed the first time the node is reached
+    bounds = {}
+
+    settled = 0
+    while not H.is_empty():
+        u = H.pop_min()
+        settled += 1
+        if u == target or dist[u] == INF:
+            break
+
+        for edge, weight in edges(u):
+            new_dist = dist[u] + weight
+            if new_dist < dist[edge]:
+                dist[edge] = new_dist
+                prev[edge] = u
+                if edge not in bounds:
+                    bounds[edge] = heuristic(edge, target)
+                H.update_priority(edge, new_dist + bounds[edge])
+
+    ans = []
+    helper = target
+    while helper is not None:
+        ans.append(helper)
+        helper = prev[helper]
+
+    return ans[::-1], dist[target], settled
+
+def find_shortest_path_alt(
+        graph,
+        source: int,
+        target: int,
+        index,
+        pq='heap'
+) -> tuple[list[int], float, int]:
+    """
+    A* guided by the landmark lower bounds of a landmarks.LandmarkIndex built for `graph`
+    (ALT); returns the same as find_shortest_path_astar
+    """
+    return find_shortest_path_astar(graph, source, target, index.heuristic(), pq)
+
+def find_shortest_path_instrumented(
+        graph,
+        source: int,
+        target: int,
+        pq='heap',
+        instrument: bool = True
+) -> tuple[list[int], float] | tuple[list[int], float, SearchStats]:
+    """
+    find_shortest_path_with_heap (on either graph form or a CSRGraph) with its work counted
+    into a SearchStats, which is added to the enclosing collect_stats block's, if any,
+    and returned as a third value with `instrument`.
+    The counting copies of the search loops keep the uncounted ones free of it.
+    """
+    stats = SearchStats(searches=1, max_queue_size=len(graph))
+    start = perf_counter()
+    if isinstance(graph, CSRGraph):
+        dist = np.full(len(graph), INF)
+        prev = np.full(len(graph), -1, dtype=np.int32)
+    else:
+        dist = [INF] * len(graph)
+        prev = [None] * len(graph)
+    dist[source] = 0
+    H = make_pq(pq, dist, stats)
+    setup_end = perf_counter()
+
+    if isinstance(graph, CSRGraph):
+        search_csr_counted(H, dist, prev, graph, target, stats)
+    else:
+        search_counted(H, dist, prev, graph, target, stats)
+    search_end = perf_counter()
+
+    if isinstance(graph, CSRGraph):
+        path, cost = tree_path(dist, prev, target)
+    else:
+        ans = []
+        helper = target
+        while helper is not None:
+            ans.append(helper)
+            helper = prev[helper]
+        path, cost = ans[::-1], dist[target]
+    end = perf_counter()
+
+    stats.seconds.update(setup=setup_end - start, search=search_end - setup_end, path=end - search_end)
+    if (collecting := active_stats()) is not None:
+        collecting.add(stats)
+    return (path, cost, stats) if instrument else (path, cost)
+
+def search_counted(H, dist, prev, graph, target, stats: SearchStats):
+    """iterate_through's search, counting pops, relaxations and decrease-keys"""
+    while not H.is_empty():
+        u = H.pop_min()
+        stats.pops += 1
+
+        if u == target:
+            break
+        edges = graph[u]
+        stats.relaxations += len(edges)
+        for edge in edges:
+            if dist[edge] > (dist[u] + edges[edge]):
+                dist[edge] = dist[u] + edges[edge]
+                prev[edge] = u
+                stats.decrease_keys += 1
+                H.update_priority(edge, dist[edge])
+
+def search_csr_counted(H, dist, prev, graph: CSRGraph, target, stats: SearchStats):
+    """find_shortest_path_csr's search, counting pops, relaxations and decrease-keys"""
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    while not H.is_empty():
+        u = H.pop_min()
+        stats.pops += 1
+        if u == target or dist[u] == INF:
+            break
+
+        start, end = offsets[u], offsets[u + 1]
+        neighbors = targets[start:end]
+        candidates = dist[u] + weights[start:end]
+        stats.relaxations += len(neighbors)
+        better = candidates < dist[neighbors]
+        if not better.any():
+            continue
+
+        neighbors = neighbors[better]
+        candidates = candidates[better]
+        dist[neighbors] = candidates
+        prev[neighbors] = u
+        stats.decrease_keys += len(neighbors)
+        for edge, new_dist in zip(neighbors.tolist(), candidates.tolist()):
+            H.update_priority(edge, new_dist)
+
+def make_pq(pq, dist, stats: SearchStats | None = None):
+    if isinstance(pq, str):
+        if pq not in PRIORITY_QUEUES:
+            raise ValueError(f'Unknown priority queue {pq!r}; expected one of {", ".join(PRIORITY_QUEUES)}')
+        pq = PRIORITY_QUEUES[pq]
+    if stats is not None:
+        return counting_queue(pq)(dist, stats)
+    return pq(dist)
+
 def iterate_through(H, dist, prev, graph, target):
     while not H.is_empty():
         u = H.pop_min()
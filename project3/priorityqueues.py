@@ -1,3 +1,6 @@
+from array import array
+
+
 class LinearPQ:
     def __init__(self, distances):
         self.queue = {}
@@ -17,85 +20,269 @@ class LinearPQ:
 
 
 class HeapPQ:
+    """
+    Indexed binary min-heap over the keys 0..len(distances)-1.
+    The heap lives in parallel arrays (keys and priorities by heap slot)
+    plus positions, the heap slot of each key (-1 once popped),
+    so an update is an array write and a sift, with no tuples allocated.
+    The children of slot i are 2i+1 and 2i+2; its parent is (i-1)//2.
+    """
+    arity = 2
+
     def __init__(self, distances):
-        self.heap_tree = []
-        for i in range(len(distances)):
-            self.heap_tree.append((i, distances[i]))
+        self.keys = array('l', range(len(distances)))
+        self.priorities = array('d', distances)
+        self.positions = array('l', range(len(distances)))
 
-        self.find_items = {}
-        for i in range(len(distances)):
-            self.find_items[i] = i
+        # bottom-up heapify: O(n) sifts from the last parent back to the root
+        for i in range((len(distances) - 2) // self.arity, -1, -1):
+            self.percolate_downward(i)
 
-        #then percolate up to make complete tree
-        for i in range(len(distances)-1, -1, -1):
-            self.percolate_upward(i)
+    @property
+    def heap_tree(self):
+        """(key, priority) in heap order"""
+        return list(zip(self.keys, self.priorities))
 
     def is_empty(self):
-        if self.heap_tree:
-            return False
-        return True
+        return len(self.keys) == 0
 
     def pop_min(self):
-        current_min = self.heap_tree[0][0]
-        self.swap(0,len(self.heap_tree)-1)
-
-        del self.heap_tree[len(self.heap_tree)-1]
-        del self.find_items[current_min]
+        current_min = self.keys[0]
+        self.positions[current_min] = -1
 
-        #percolate downward
-        self.percolate_downward(0)
+        last_key = self.keys.pop()
+        last_priority = self.priorities.pop()
+        if self.keys:
+            self.keys[0] = last_key
+            self.priorities[0] = last_priority
+            self.positions[last_key] = 0
+            self.percolate_downward(0)
 
         return current_min
 
     def update_priority(self, key, new_priority):
-        if key not in self.find_items:
+        if key >= len(self.positions) or self.positions[key] == -1:
             return
 
-        i = self.find_items[key]
-
-        curr_priority = self.heap_tree[i][1]
-
-        self.heap_tree[i] = (key, new_priority)
+        i = self.positions[key]
+        curr_priority = self.priorities[i]
+        self.priorities[i] = new_priority
 
         if curr_priority > new_priority:
-            #percolate upward
             self.percolate_upward(i)
         else:
-            #percolate downward
             self.percolate_downward(i)
 
-    def swap(self, first, second):
-        item1 = self.heap_tree[first][0]
-        item2 = self.heap_tree[second][0]
+    def percolate_upward(self, index):
+        keys, priorities, positions = self.keys, self.priorities, self.positions
+        key = keys[index]
+        priority = priorities[index]
+
+        # move parents down into the hole until the item fits, then drop it in
+        while index > 0:
+            parent_i = (index - 1) >> 1
+            if priorities[parent_i] <= priority:
+                break
+            keys[index] = keys[parent_i]
+            priorities[index] = priorities[parent_i]
+            positions[keys[index]] = index
+            index = parent_i
+
+        keys[index] = key
+        priorities[index] = priority
+        positions[key] = index
+
+    def percolate_downward(self, index):
+        keys, priorities, positions = self.keys, self.priorities, self.positions
+        size = len(keys)
+        key = keys[index]
+        priority = priorities[index]
 
-        self.find_items[item1] = second
-        self.find_items[item2] = first
+        # move the smaller child up into the hole until the item fits
+        while True:
+            change = index * 2 + 1
+            if change >= size:
+                break
+            right = change + 1
+            if right < size and priorities[right] < priorities[change]:
+                change = right
+            if priorities[change] >= priority:
+                break
+            keys[index] = keys[change]
+            priorities[index] = priorities[change]
+            positions[keys[index]] = index
+            index = change
 
-        temp = self.heap_tree[first]
-        self.heap_tree[first] = self.heap_tree[second]
-        self.heap_tree[second] = temp
+        keys[index] = key
+        priorities[index] = priority
+        positions[key] = index
+
+
+class DaryHeapPQ(HeapPQ):
+    """
+    HeapPQ with arity children per slot (4 by default): the children of slot i are
+    arity*i+1 .. arity*i+arity and its parent is (i-1)//arity.
+    A shallower tree makes the decrease-key sifts of Dijkstra on dense graphs cheaper,
+    at the price of comparing more children per level when popping.
+    """
+    def __init__(self, distances, arity=4):
+        self.arity = arity
+        super().__init__(distances)
 
     def percolate_upward(self, index):
-        parent_i = index//2
+        keys, priorities, positions = self.keys, self.priorities, self.positions
+        arity = self.arity
+        key = keys[index]
+        priority = priorities[index]
 
-        if parent_i < index and self.heap_tree[parent_i][1] > self.heap_tree[index][1]:
-            self.swap(index, parent_i)
-            self.percolate_upward(parent_i)
+        while index > 0:
+            parent_i = (index - 1) // arity
+            if priorities[parent_i] <= priority:
+                break
+            keys[index] = keys[parent_i]
+            priorities[index] = priorities[parent_i]
+            positions[keys[index]] = index
+            index = parent_i
+
+        keys[index] = key
+        priorities[index] = priority
+        positions[key] = index
 
     def percolate_downward(self, index):
-        left = index * 2 + 1
-        right = index * 2 + 2
+        keys, priorities, positions = self.keys, self.priorities, self.positions
+        arity = self.arity
+        size = len(keys)
+        key = keys[index]
+        priority = priorities[index]
+
+        while True:
+            first = index * arity + 1
+            if first >= size:
+                break
+            change = first
+            for child in range(first + 1, min(first + arity, size)):
+                if priorities[child] < priorities[change]:
+                    change = child
+            if priorities[change] >= priority:
+                break
+            keys[index] = keys[change]
+            priorities[index] = priorities[change]
+            positions[keys[index]] = index
+            index = change
 
-        change = index
-        if left < len(self.heap_tree) and self.heap_tree[left][1] < self.heap_tree[index][1]:
-            change = left
+        keys[index] = key
+        priorities[index] = priority
+        positions[key] = index
 
-        if (right < len(self.heap_tree) and self.heap_tree[right][1] < self.heap_tree[index][1]
-            and self.heap_tree[right][1] < self.heap_tree[left][1]):
-            change = right
 
-        if change == index:
+class PairingHeapPQ:
+    """
+    Pairing heap over the keys 0..len(distances)-1, stored in arrays indexed by key:
+    each key's first child, its next sibling, and prev (its parent if it is a first child,
+    otherwise its previous sibling); -1 means none.
+    Decreasing a priority cuts the key's subtree and melds it with the root in O(1),
+    which suits Dijkstra's many decrease-keys; pop_min pays for the restructuring
+    with a two-pass merge of the root's children (O(log n) amortized).
+    """
+    def __init__(self, distances):
+        n = len(distances)
+        self.priorities = array('d', distances)
+        self.child = array('l', [-1]) * n
+        self.sibling = array('l', [-1]) * n
+        self.prev = array('l', [-1]) * n
+        self.in_heap = bytearray([1]) * n
+        self.size = n
+
+        self.root = -1
+        for key in range(n):
+            self.root = self.meld(self.root, key)
+
+    def is_empty(self):
+        return self.size == 0
+
+    def pop_min(self):
+        current_min = self.root
+        self.in_heap[current_min] = 0
+        self.size -= 1
+        self.root = self.merge_pairs(self.child[current_min])
+        self.child[current_min] = -1
+        return current_min
+
+    def update_priority(self, key, new_priority):
+        if key >= len(self.in_heap) or not self.in_heap[key]:
             return
 
-        self.swap(index, change)
-        self.percolate_downward(change)
+        curr_priority = self.priorities[key]
+        self.priorities[key] = new_priority
+
+        if new_priority < curr_priority:
+            if key != self.root:
+                self.cut(key)
+                self.root = self.meld(self.root, key)
+        elif new_priority > curr_priority:
+            # its children may now belong above it: take the key out and put it back in alone
+            if key == self.root:
+                self.root = self.merge_pairs(self.child[key])
+            else:
+                self.cut(key)
+                self.root = self.meld(self.root, self.merge_pairs(self.child[key]))
+            self.child[key] = -1
+            self.root = self.meld(self.root, key)
+
+    def meld(self, first, second):
+        """Meld two trees (roots with no siblings) and return the new root"""
+        if first == -1:
+            return second
+        if second == -1:
+            return first
+        if self.priorities[second] < self.priorities[first]:
+            first, second = second, first
+
+        # second becomes the first child of first
+        old_child = self.child[first]
+        self.sibling[second] = old_child
+        if old_child != -1:
+            self.prev[old_child] = second
+        self.prev[second] = first
+        self.child[first] = second
+        return first
+
+    def cut(self, key):
+        """Detach key's subtree from its parent's list of children"""
+        prev = self.prev[key]
+        next_sibling = self.sibling[key]
+        if self.child[prev] == key:
+            self.child[prev] = next_sibling
+        else:
+            self.sibling[prev] = next_sibling
+        if next_sibling != -1:
+            self.prev[next_sibling] = prev
+        self.prev[key] = -1
+        self.sibling[key] = -1
+
+    def merge_pairs(self, first):
+        """Meld a list of sibling trees: pairwise left to right, then the pairs right to left"""
+        sibling, prev = self.sibling, self.prev
+        pairs = []
+        while first != -1:
+            second = sibling[first]
+            following = -1 if second == -1 else sibling[second]
+            sibling[first] = prev[first] = -1
+            if second != -1:
+                sibling[second] = prev[second] = -1
+            pairs.append(self.meld(first, second))
+            first = following
+
+        root = -1
+        for tree in reversed(pairs):
+            root = self.meld(tree, root)
+        return root
+
+
+# pq= names for the network_routing finders
+PRIORITY_QUEUES = {
+    'linear': LinearPQ,
+    'heap': HeapPQ,
+    'dary': DaryHeapPQ,
+    'pairing': PairingHeapPQ,
+}
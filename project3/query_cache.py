@@ -0,0 +1,113 @@
+import hashlib
+import sys
+from collections import OrderedDict
+from functools import partial
+
+from graphs import CSRGraph
+from network_routing import shortest_path_tree, tree_path
+
+
+def graph_fingerprint(graph) -> str:
+    """
+    Hash of a graph's nodes, edges and weights (either form, or a CSRGraph):
+    equal graphs give the same fingerprint, and any edited weight or edge changes it
+    """
+    graph = CSRGraph.from_graph(graph)
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (graph.offsets, graph.targets, graph.weights):
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class QueryCache:
+    """
+    Memoized shortest-path queries, answered the same as network_routing.find_shortest_path_with_heap.
+
+    A query that misses runs one shortest_path_tree from its source and caches the whole tree,
+    so later queries from that source to any target are read off the tree without a search.
+    Entries (paths, trees and the CSR form of each graph) are keyed by the graph's fingerprint,
+    which the caller supplies (or bind computes once), so an edited graph given its new
+    fingerprint never sees stale results. Entries are evicted least recently used first
+    once there are more than max_entries or they hold more than max_bytes.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 256 * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.tree_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (value, bytes)
+
+    def find_shortest_path(self, graph, source: int, target: int, fingerprint: str
+                           ) -> tuple[list[int], float]:
+        """
+        The shortest (path, cost) from source to target in graph, whose graph_fingerprint
+        (computed once by the caller, and again after every edit) is fingerprint.
+        """
+        path_key = ('path', fingerprint, source, target)
+        result = self._get(path_key)
+        if result is not None:
+            self.hits += 1
+            return result[0].copy(), result[1]
+
+        tree = self._get(('tree', fingerprint, source))
+        if tree is not None:
+            self.tree_hits += 1
+        else:
+            self.misses += 1
+            tree = shortest_path_tree(self._csr(graph, fingerprint), source)
+            self._put(('tree', fingerprint, source), tree, tree[0].nbytes + tree[1].nbytes)
+
+        path, cost = tree_path(*tree, target)
+        self._put(path_key, (path, cost), sys.getsizeof(path) + 32 * len(path))
+        return path.copy(), cost
+
+    def bind(self, graph):
+        """
+        find_shortest_path(source, target) for graph, fingerprinting it and converting it to CSR once.
+        Edits made to graph afterwards are not seen; bind it again after editing it.
+        """
+        graph = CSRGraph.from_graph(graph)
+        return partial(self.find_shortest_path, graph, fingerprint=graph_fingerprint(graph))
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'tree_hits': self.tree_hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entries': len(self._entries), 'bytes': self.nbytes}
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _csr(self, graph, fingerprint: str) -> CSRGraph:
+        if isinstance(graph, CSRGraph):
+            return graph
+        key = ('graph', fingerprint)
+        csr = self._get(key)
+        if csr is None:
+            csr = CSRGraph.from_graph(graph)
+            self._put(key, csr, csr.nbytes)
+        return csr
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _put(self, key, value, size: int):
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self.nbytes += size
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
@@ -1,6 +1,25 @@
+import random
+import subprocess
+import sys
+from functools import partial
+from math import inf as INF
+from pathlib import Path
+
+import numpy as np
 from byu_pytest_utils import max_score, with_import
 
+import network_routing
+from all_pairs import all_pairs_shortest_paths
+from benchmark import read_report, regressions, write_report
+from contraction import ContractionHierarchy
+from dynamic import DynamicShortestPathTree
+from generation import generate_csr_graph
+from graphs import CSRGraph, reverse_graph
+from heuristics import admissible_scale, euclidean_heuristic, zero_heuristic
+from instrumentation import collect_stats
+from landmarks import LandmarkIndex
 from main import generate_graph
+from query_cache import QueryCache, graph_fingerprint
 
 
 def tiny_test(finder):
@@ -66,3 +85,276 @@ def test_large_network_heap(find_shortest_path_with_heap):
 @with_import('network_routing')
 def test_large_network_array(find_shortest_path_with_array):
     large_test(find_shortest_path_with_array)
+
+
+@max_score(2)
+def test_priority_queue_backends():
+    for pq in ['linear', 'heap', 'dary', 'pairing']:
+        tiny_test(partial(network_routing.find_shortest_path_with_heap, pq=pq))
+        small_test(partial(network_routing.find_shortest_path_with_heap, pq=pq))
+        large_test(partial(network_routing.find_shortest_path_with_heap, pq=pq))
+
+
+@max_score(2)
+@with_import('network_routing')
+def test_lazy_heap(find_shortest_path_lazy):
+    tiny_test(find_shortest_path_lazy)
+    small_test(find_shortest_path_lazy)
+    large_test(find_shortest_path_lazy)
+
+    graph = {0: {1: 1}, 1: {}, 2: {0: 1}}
+    assert find_shortest_path_lazy(graph, 0, 2) == ([2], INF)
+
+
+@max_score(2)
+def test_csr_graph():
+    _, graph = generate_graph(312, 1000, 0.2, 0.05)
+    csr = CSRGraph.from_graph(graph)
+    assert csr.to_dict() == graph
+    assert csr.reverse().reverse().to_dict() == {u: dict(sorted(edges.items())) for u, edges in graph.items()}
+
+    def on_csr(finder):
+        return lambda graph, source, target: finder(CSRGraph.from_graph(graph), source, target)
+
+    tiny_test(on_csr(network_routing.find_shortest_path_csr))
+    small_test(on_csr(network_routing.find_shortest_path_with_heap))
+    large_test(on_csr(network_routing.find_shortest_path_with_array))
+
+    matrix = [[0, 2, INF], [INF, 0, 1], [5, None, 0]]
+    assert network_routing.find_shortest_path_csr(CSRGraph.from_matrix(matrix), 0, 2) == ([0, 1, 2], 3)
+
+
+@max_score(3)
+def test_bidirectional():
+    def bidirectional(graph, source, target):
+        path, cost, settled = network_routing.find_shortest_path_bidirectional(graph, source, target)
+        return path, cost
+
+    tiny_test(bidirectional)
+    small_test(bidirectional)
+    large_test(bidirectional)
+
+    _, graph = generate_graph(312, 1000, 0.01, 0.05)
+    reverse = reverse_graph(graph)
+    csr = CSRGraph.from_graph(graph)
+    for source, target in [(0, 999), (2, 9), (17, 500), (5, 5)]:
+        path, cost, settled = network_routing.find_shortest_path_bidirectional(graph, source, target, reverse)
+        assert (path, cost) == network_routing.find_shortest_path_with_heap(graph, source, target)
+        assert network_routing.find_shortest_path_bidirectional(csr, source, target) == (path, cost, settled)
+
+
+@max_score(3)
+def test_astar():
+    def dijkstra(graph, source, target):
+        path, cost, settled = network_routing.find_shortest_path_astar(graph, source, target, zero_heuristic)
+        return path, cost
+
+    tiny_test(dijkstra)
+    small_test(dijkstra)
+    large_test(dijkstra)
+
+    # Exactly Euclidean weights: the straight-line heuristic is consistent
+    positions, graph = generate_graph(312, 2000, 0.01, 0)
+    assert admissible_scale(graph, positions) == 1
+    for source, target in [(0, 1999), (2, 9), (17, 500)]:
+        path, cost, settled = network_routing.find_shortest_path_astar(
+            graph, source, target, euclidean_heuristic(positions), pq='dary')
+        assert (path, cost) == network_routing.find_shortest_path_with_heap(graph, source, target)
+        assert settled < network_routing.find_shortest_path_astar(graph, source, target, zero_heuristic)[2]
+
+
+@max_score(3)
+def test_landmarks(tmp_path):
+    _, graph = generate_graph(312, 1000, 0.01, 0.05)
+    LandmarkIndex.build(graph, 4).save(tmp_path)
+    index = LandmarkIndex.load(tmp_path)
+    assert len(index.landmarks) == 4
+    assert index.from_landmarks.shape == index.to_landmarks.shape == (1000, 4)
+
+    for source, target in [(0, 999), (2, 9), (17, 500), (5, 5)]:
+        path, cost, settled = network_routing.find_shortest_path_alt(graph, source, target, index)
+        assert (path, cost) == network_routing.find_shortest_path_with_heap(graph, source, target)
+        assert settled <= network_routing.find_shortest_path_astar(graph, source, target, zero_heuristic)[2]
+
+
+@max_score(3)
+def test_contraction_hierarchy():
+    tiny_test(lambda graph, source, target: ContractionHierarchy.build(graph).find_shortest_path(source, target))
+    small_test(lambda graph, source, target: ContractionHierarchy.build(graph).find_shortest_path(source, target))
+
+    _, graph = generate_graph(312, 300, 0.01, 0.05)
+    hierarchy = ContractionHierarchy.build(CSRGraph.from_graph(graph))
+    for source in range(0, 300, 7):
+        for target in range(3, 300, 31):
+            assert hierarchy.find_shortest_path(source, target) == \
+                network_routing.find_shortest_path_with_heap(graph, source, target)
+
+
+@max_score(3)
+def test_shortest_path_trees():
+    def tree(graph, source, target):
+        return network_routing.tree_path(*network_routing.shortest_path_tree(graph, source), target)
+
+    tiny_test(tree)
+    small_test(tree)
+    large_test(tree)
+
+    _, graph = generate_graph(312, 300, 0.02, 0.05)
+    targets = [299, 2, 150, 0]
+    paths = network_routing.find_shortest_paths(graph, 0, targets)
+    assert paths == {target: network_routing.find_shortest_path_with_heap(graph, 0, target) for target in targets}
+
+    sources = [0, 17, 299]
+    dist, prev = all_pairs_shortest_paths(graph, sources, workers=2)
+    inline = all_pairs_shortest_paths(graph, sources, workers=1)
+    assert (dist == inline[0]).all() and (prev == inline[1]).all()
+    for row, source in enumerate(sources):
+        for target in range(0, 300, 13):
+            assert network_routing.tree_path(dist[row], prev[row], target) == \
+                network_routing.find_shortest_path_with_heap(graph, source, target)
+
+
+@max_score(3)
+def test_query_cache():
+    cache = QueryCache()
+    tiny_test(lambda graph, source, target: cache.bind(graph)(source, target))
+    small_test(lambda graph, source, target: cache.bind(graph)(source, target))
+
+    _, graph = generate_graph(312, 300, 0.02, 0.05)
+    fingerprint = graph_fingerprint(graph)
+    assert fingerprint == graph_fingerprint(CSRGraph.from_graph(graph))
+    cache = QueryCache(max_entries=8)
+    for source, target in [(0, 299), (0, 150), (0, 299), (5, 7), (0, 150)]:
+        assert cache.find_shortest_path(graph, source, target, fingerprint) == \
+            network_routing.find_shortest_path_with_heap(graph, source, target)
+    assert (cache.hits, cache.tree_hits, cache.misses) == (2, 1, 2)
+    assert len(cache) <= 8
+
+    # An edited graph gets a new fingerprint, so nothing stale is returned
+    graph[0] = {299: 0.001}
+    assert graph_fingerprint(graph) != fingerprint
+    assert cache.find_shortest_path(graph, 0, 299, graph_fingerprint(graph)) == ([0, 299], 0.001)
+    assert cache.bind(graph)(0, 299) == ([0, 299], 0.001)
+
+    cache = QueryCache(max_bytes=3000)
+    for target in range(50):
+        cache.find_shortest_path(graph, target, 0, fingerprint)
+    assert cache.nbytes <= 3000 and cache.evictions > 0
+
+
+@max_score(3)
+def test_generate_csr_graph(tmp_path):
+    positions, graph = generate_csr_graph(312, 300, 0.02, 0.05, exact=True)
+    expected_positions, expected = generate_graph(312, 300, 0.02, 0.05)
+    assert positions.tolist() == [list(p) for p in expected_positions]
+    assert graph.to_dict() == expected
+
+    positions, graph = generate_csr_graph(312, 1000, 0.05, 0.05)
+    assert positions.shape == (1000, 2) and graph.edge_count == 1000 * 50
+    for u in range(0, 1000, 97):
+        targets, weights = graph.neighbors(u)
+        assert len(set(targets.tolist())) == len(targets)
+        assert (weights >= 0).all()
+
+    cached = generate_csr_graph(312, 1000, 0.05, 0.05, cache_dir=tmp_path)
+    reused = generate_csr_graph(312, 1000, 0.05, 0.05, cache_dir=tmp_path)
+    assert isinstance(reused[1].weights, np.memmap)
+    for a, b in zip((cached[1], reused[1]), (graph, graph)):
+        assert (a.targets == b.targets).all() and (a.weights == b.weights).all()
+    assert network_routing.find_shortest_path_with_heap(reused[1], 0, 999) == \
+        network_routing.find_shortest_path_with_heap(graph.to_dict(), 0, 999)
+
+
+@max_score(3)
+def test_instrumentation():
+    def instrumented(graph, source, target):
+        path, cost, stats = network_routing.find_shortest_path_with_heap(graph, source, target, instrument=True)
+        assert stats.searches == 1 and stats.pops >= 1
+        return path, cost
+
+    tiny_test(instrumented)
+    small_test(instrumented)
+
+    _, graph = generate_graph(312, 500, 0.05, 0.05)
+    csr = CSRGraph.from_graph(graph)
+    expected = network_routing.find_shortest_path_with_heap(graph, 0, 499)
+    counts = None
+    for pq in ['linear', 'heap', 'dary', 'pairing']:
+        for g in (graph, csr):
+            path, cost, stats = network_routing.find_shortest_path_with_array(g, 0, 499, pq=pq, instrument=True)
+            assert (path, cost) == expected
+            assert stats.decrease_keys <= stats.relaxations
+            assert stats.max_queue_size == 500
+            assert (stats.sift_swaps == 0) == (pq == 'linear')
+            # the searches do the same work whichever queue holds the nodes
+            assert counts in (None, (stats.pops, stats.relaxations, stats.decrease_keys))
+            counts = (stats.pops, stats.relaxations, stats.decrease_keys)
+
+    with collect_stats() as stats:
+        assert network_routing.find_shortest_path_with_heap(graph, 0, 499) == expected
+        network_routing.find_shortest_path_with_heap(csr, 3, 9)
+    assert stats.searches == 2 and stats.pops > counts[0]
+    assert all(seconds > 0 for seconds in stats.seconds.values())
+
+    # nested blocks: each search counts into the innermost block only
+    with collect_stats() as outer:
+        with collect_stats() as inner:
+            network_routing.find_shortest_path_with_heap(graph, 0, 499)
+        network_routing.find_shortest_path_with_heap(graph, 3, 9)
+        network_routing.find_shortest_path_with_heap(graph, 3, 9)
+    assert (outer.searches, inner.searches) == (2, 1)
+    network_routing.find_shortest_path_with_heap(graph, 3, 9)
+    assert outer.searches == 2
+
+
+@max_score(3)
+def test_dynamic_shortest_path_tree():
+    _, graph = generate_graph(312, 400, 0.01, 0.05)
+    rng = random.Random(312)
+    tree = DynamicShortestPathTree(graph, 0)
+    for step in range(150):
+        # batches of weight increases, decreases, removals and new edges
+        changes = []
+        for _ in range(rng.choice([1, 3, 10])):
+            u = rng.randrange(400)
+            if graph[u] and rng.random() < 0.8:
+                v = rng.choice(list(graph[u]))
+                weight = graph[u][v] * rng.choice([0, 0.5, 2, 10]) if rng.random() < 0.9 else INF
+            else:
+                v = rng.randrange(400)
+                weight = rng.random()
+            changes.append((u, v, weight))
+            if weight == INF:
+                graph[u].pop(v, None)
+            else:
+                graph[u][v] = weight
+        tree.update_many(changes)
+
+        dist, _ = network_routing.shortest_path_tree(graph, 0)
+        assert tree.dist == dist.tolist()
+        for v, u in enumerate(tree.prev):
+            assert u == -1 or tree.dist[u] + graph[u][v] == tree.dist[v]
+        target = rng.randrange(400)
+        assert tree.path(target)[1] == network_routing.find_shortest_path_with_heap(graph, 0, target)[1]
+
+
+@max_score(1)
+def test_benchmark_does_not_load_matplotlib():
+    # plotting is only imported for --plot, so the suite runs without a display or matplotlib installed
+    code = 'import sys, benchmark; assert "matplotlib" not in sys.modules'
+    subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).parent, check=True)
+
+
+@max_score(1)
+def test_benchmark_report(tmp_path):
+    # an unreachable query costs inf, which is written as null so the report is plain JSON
+    result = {'costs': [1.5, INF], 'seconds': 1.0, 'seconds_spread': 0.0, 'peak_memory_mb': 1.0, 'relaxations': 0}
+    report = {'results': {'tiny/heap': result}}
+    write_report(report, tmp_path / 'report.json')
+    assert 'Infinity' not in (tmp_path / 'report.json').read_text()
+    baseline = read_report(tmp_path / 'report.json')
+    assert baseline == report and regressions(report, baseline) == []
+
+    # relaxations up from a baseline of 0 are reported as a difference rather than a percentage
+    assert regressions({'results': {'tiny/heap': {**result, 'relaxations': 3}}}, baseline) == \
+        ['tiny/heap: relaxations 3.000 vs baseline 0.000 (+3.000)']
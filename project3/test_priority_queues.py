@@ -1,14 +1,24 @@
-from priorityqueues import LinearPQ, HeapPQ
+import random
+
+from priorityqueues import LinearPQ, HeapPQ, DaryHeapPQ, PairingHeapPQ
 from math import inf as INF
 
+HEAPS = [HeapPQ, DaryHeapPQ, PairingHeapPQ]
+
+
 def test_pqs():
+    for heap_class in HEAPS:
+        check_pqs(heap_class)
+
+
+def check_pqs(heap_class):
     items = list(range(10))
 
     linear_pq = LinearPQ(items)
     for i in range(10):
         linear_pq.update_priority(i, INF)
 
-    heap_pq = HeapPQ(items)
+    heap_pq = heap_class(items)
     for i in range(10):
         heap_pq.update_priority(i, INF)
 
@@ -26,7 +36,28 @@ def test_pqs():
     assert linear_pq.pop_min() == 5
     assert linear_pq.pop_min() == 3
 
-    print(heap_pq.heap_tree)
     assert heap_pq.pop_min() == 5
-    print(heap_pq.heap_tree)
     assert heap_pq.pop_min() == 3
+
+
+def test_heap_pq_matches_linear_pq():
+    for heap_class in HEAPS:
+        check_matches_linear_pq(heap_class)
+
+
+def check_matches_linear_pq(heap_class):
+    rng = random.Random(312)
+    priorities = [rng.random() for _ in range(500)]
+    linear_pq = LinearPQ(priorities)
+    heap_pq = heap_class(priorities)
+
+    while not linear_pq.is_empty():
+        for _ in range(5):
+            key = rng.randrange(500)
+            priority = rng.random()
+            if key in linear_pq.queue:
+                linear_pq.update_priority(key, priority)
+            heap_pq.update_priority(key, priority)
+        assert heap_pq.pop_min() == linear_pq.pop_min()
+
+    assert heap_pq.is_empty()
@@ -1,5 +1,23 @@
+import math
+from functools import partial
+
+import numpy as np
+
+from scoring import ScoringScheme, linear_scheme
+
+# Traceback directions, in the order ties are broken
+DIAG = 0
+LEFT = 1
+UP = 2
+
+# Stands in for infinity in the int32 score rows; leaves headroom so adding
+# a penalty to it can never overflow
+_INF = np.int32(2 ** 30)
+
+
 def align(seq1: str, seq2: str, match_award=-3, indel_penalty=5,
-        sub_penalty=1, banded_width=-1,gap='-') -> tuple[float, str | None, str | None]:
+        sub_penalty=1, banded_width=-1,gap='-', backend='rows',
+        score_only=False, scheme: ScoringScheme | None = None) -> tuple[float, str | None, str | None]:
     """
         Align seq1 against seq2 using Needleman-Wunsch
         Put seq1 on left (j) and seq2 on top (i)
@@ -9,10 +27,718 @@ def align(seq1: str, seq2: str, match_award=-3, indel_penalty=5,
         :param match_award: how many points to award a match
         :param indel_penalty: how many points to award a gap in either sequence
         :param sub_penalty: how many points to award a substitution
-        :param banded_width: banded_width * 2 + 1 is the width of the banded alignment; -1 indicates full alignment
+        :param banded_width: banded_width * 2 + 1 is the width of the banded alignment; -1 indicates full alignment;
+            'adaptive' widens a band until it provably holds the optimal alignment (same result as -1)
+        :param gap: the character to use to represent gaps in the alignment strings
+        :param backend: 'rows' fills a row at a time, 'wavefront' an anti-diagonal at a time; results are identical
+        :param score_only: skip the traceback and return (cost, None, None); see alignment_score
+        :param scheme: substitution matrix and affine gap costs (see scoring.py); replaces the three costs above
+        :return: alignment cost, alignment 1, alignment 2
+    """
+    if score_only:
+        return alignment_score(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, scheme), None, None
+
+    cost, ops = align_ops(seq1, seq2, match_award, indel_penalty, sub_penalty, banded_width, backend, scheme)
+    if ops is None:
+        return cost, None, None
+
+    alignment_1, alignment_2 = apply_ops(ops, seq1, seq2, gap)
+    return cost, alignment_1, alignment_2
+
+
+def align_ops(seq1: str, seq2: str, match_award=-3, indel_penalty=5,
+        sub_penalty=1, banded_width=-1, backend='rows',
+        scheme: ScoringScheme | None = None) -> tuple[float, str | None]:
+    """
+        Same alignment as align, as a string of edit operations, one per alignment column:
+        'M' pairs a character of seq1 with one of seq2 (match or substitution),
+        'I' is a character of seq1 against a gap, 'D' a gap against a character of seq2.
+        Use apply_ops for the gapped strings or cigar for a CIGAR string.
+        :return: alignment cost, edit operations (None if the corner is outside the band)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown backend {backend!r}; expected one of {", ".join(BACKENDS)}')
+
+    scheme = scheme or linear_scheme(match_award, indel_penalty, sub_penalty)
+    a = scheme.encode(seq1)
+    b = scheme.encode(seq2)
+
+    if banded_width == 'adaptive':
+        banded_width, _ = _adaptive_band(a, b, scheme)
+
+    if banded_width != -1 and abs(len(a) - len(b)) > banded_width:
+        # The bottom-right corner is outside the band
+        return math.inf, None
+
+    cost, traceback = _engine(scheme, backend)(a, b, scheme, banded_width)
+    return cost, traceback().decode('ascii')
+
+
+def _engine(scheme: ScoringScheme, backend: str):
+    """Fill function for the scheme: the backend for linear gaps, the Gotoh rows for affine ones"""
+    if not scheme.gap_open:
+        return BACKENDS[backend]
+    if backend != 'rows':
+        raise ValueError(f'The {backend!r} backend only supports linear gaps (gap_open=0)')
+    return _fill_affine
+
+
+def apply_ops(ops: str, seq1: str, seq2: str, gap='-') -> tuple[str, str]:
+    """
+    The two gapped alignment strings described by the edit operations from align_ops.
+    ASCII bytes sequences (see ScoringScheme.encode) are decoded.
+    """
+    if not isinstance(seq1, str):
+        seq1 = bytes(seq1).decode('ascii')
+    if not isinstance(seq2, str):
+        seq2 = bytes(seq2).decode('ascii')
+    chars_1 = iter(seq1)
+    chars_2 = iter(seq2)
+    alignment_1 = ''.join(gap if op == 'D' else next(chars_1) for op in ops)
+    alignment_2 = ''.join(gap if op == 'I' else next(chars_2) for op in ops)
+    return alignment_1, alignment_2
+
+
+def cigar(ops: str) -> str:
+    """Run-length encode edit operations from align_ops as a CIGAR string, e.g. 'MMMID' -> '3M1I1D'"""
+    runs = []
+    start = 0
+    for end in range(1, len(ops) + 1):
+        if end == len(ops) or ops[end] != ops[start]:
+            runs.append(f'{end - start}{ops[start]}')
+            start = end
+    return ''.join(runs)
+
+
+def alignment_score(seq1: str, seq2: str, match_award=-3, indel_penalty=5,
+        sub_penalty=1, banded_width=-1, scheme: ScoringScheme | None = None) -> float:
+    """
+        The cost align would return, without building the matrix or the alignment strings.
+        Only two rows are kept, each as long as the shorter sequence (or the band),
+        so memory is O(min(len(seq1), len(seq2))).
+        :return: alignment cost; inf if the bottom-right corner is outside the band
+    """
+    scheme = scheme or linear_scheme(match_award, indel_penalty, sub_penalty)
+    a = scheme.encode(seq1)
+    b = scheme.encode(seq2)
+
+    if banded_width == 'adaptive':
+        _, cost = _adaptive_band(a, b, scheme)
+        return cost
+
+    if banded_width != -1 and abs(len(a) - len(b)) > banded_width:
+        return math.inf
+
+    # Run the rows along the shorter sequence; swapping them transposes
+    # the substitution costs, which only matters for an asymmetric matrix
+    if len(b) > len(a) and (scheme.table is None or (scheme.table == scheme.table.T).all()):
+        a, b = b, a
+
+    row = _last_row(a, b, scheme, banded_width)
+    return int(row[len(b) - len(a) + banded_width if banded_width != -1 else len(b)])
+
+
+# Narrowest band the adaptive mode tries
+_ADAPTIVE_START_WIDTH = 16
+
+
+def _adaptive_band(a, b, scheme: ScoringScheme) -> tuple[int, int]:
+    """
+    Smallest banded_width (doubling from _ADAPTIVE_START_WIDTH) whose banded alignment
+    is provably the unbanded one, and its cost; (-1, cost) if only the full matrix will do.
+
+    Shifting every cost by mu = (cheapest substitution) / 2 per character consumed
+    (so a diagonal step costs c - 2*mu >= 0 and an indel at least g - mu, g = gap_extend) changes every path to the
+    same corner by the same constant, and makes all steps non-negative.
+    A path that leaves the band does so with an indel from a cell on its edge, having
+    cost at least the banded score of that cell to get there. From the first cell outside,
+    it still needs at least |offset - (m - n)| more indels, so its remaining cost is at least
+    mu * (characters left) + (g - mu) * (indels needed).
+    When the banded optimum is strictly below that bound for every edge cell, no optimal
+    path leaves the band, and the banded traceback makes the same choices as the full one.
+    """
+    n, m = len(a), len(b)
+    mu = scheme.min_substitution / 2
+    indel_penalty = scheme.gap_extend
+    if indel_penalty < mu:
+        # Long detours would only get cheaper, so no band can be proven
+        return -1, int(_last_row(a, b, scheme)[m])
+
+    offset = m - n
+    banded_width = max(_ADAPTIVE_START_WIDTH, abs(offset))
+    while banded_width < max(n, m):
+        edges = np.full((2, n + 1), _INF, dtype=np.int32)
+        row = _last_row(a, b, scheme, banded_width, edges)
+        cost = int(row[offset + banded_width])
+
+        rows = np.arange(n + 1)
+        # Leave the right edge (j = i + banded_width) to the left, into (i, j + 1)
+        right = edges[1] + indel_penalty + mu * ((n - rows) + (m - rows - banded_width - 1)) \
+            + (indel_penalty - mu) * abs(offset - banded_width - 1)
+        right = right[(edges[1] < _INF) & (rows + banded_width < m)]
+        # Leave the left edge (j = i - banded_width) downwards, into (i + 1, j)
+        left = edges[0] + indel_penalty + mu * ((n - rows - 1) + (m - rows + banded_width)) \
+            + (indel_penalty - mu) * abs(offset + banded_width + 1)
+        left = left[(edges[0] < _INF) & (rows < n)]
+
+        if cost < min(right.min(initial=math.inf), left.min(initial=math.inf)):
+            return banded_width, cost
+        banded_width *= 2
+
+    return -1, int(_last_row(a, b, scheme)[m])
+
+
+def _fill(a, b, scheme: ScoringScheme, banded_width=-1):
+    """
+    Fill the Needleman-Wunsch matrix (linear gaps) a block of rows at a time.
+    Returns the cost and a function that traces the alignment back as edit operations.
+    Scores live in int32 rows; each finished block is reduced to a 2-bit traceback
+    direction per cell, so only the packed directions are kept for the whole matrix.
+
+    Row i is stored starting at column origin(i): 0 for the full matrix,
+    i - banded_width for a band of width 2 * banded_width + 1.
+    Positions that fall off the matrix (or out of the band) hold _INF.
+
+    The left neighbour makes each row a prefix scan:
+    H[j] = min(T[j], H[j-1] + g) where T is the better of diagonal and up,
+    which unrolls to H[j] = j*g + min over k <= j of (T[k] - k*g),
+    i.e. one np.minimum.accumulate per row.
+    """
+    n, m = len(a), len(b)
+    indel_penalty = scheme.gap_extend
+    g = np.int32(indel_penalty)
+    if banded_width == -1:
+        width, shift = m + 1, 0
+    else:
+        width, shift = 2 * banded_width + 1, 1
+
+    def origin(i):
+        return 0 if shift == 0 else i - banded_width
+
+    ks = np.arange(width, dtype=np.int32)
+    steps = ks * g
+
+    # seq2 padded so any row's slice of it can be gathered, even off the ends
+    padded_b = np.zeros(m + 2 * width + 2, dtype=b.dtype)
+    padded_b[width + 1:width + 1 + m] = b
+
+    packed_width = -(-width // 4)
+    dirs = np.empty((n + 1, packed_width), dtype=np.uint8)
+    block_rows = max(1, min(n, (1 << 20) // width))
+
+    prev = _first_row(ks + origin(0), m, scheme)
+    dirs[0] = LEFT | (LEFT << 2) | (LEFT << 4) | (LEFT << 6)
+
+    for start in range(1, n + 1, block_rows):
+        rows = range(start, min(n + 1, start + block_rows))
+        origins = np.array([origin(i) for i in rows], dtype=np.int64)
+        seq2_block = padded_b[origins[:, None] + (width + ks)]
+        subs = scheme.substitution(a[start - 1:rows[-1], None], seq2_block)
+
+        scores = np.empty((len(rows) + 1, width), dtype=np.int32)
+        scores[0] = prev
+        for r, i in enumerate(rows, start=1):
+            _next_row(scores[r - 1], scores[r], subs[r - 1], i, origin(i), shift, indel_penalty, m, steps)
+
+        dirs[start:start + len(rows)] = _block_directions(scores, subs, g, shift, [origin(i) for i in rows])
+        prev = scores[-1].copy()
+
+    cells_per_row = packed_width * 4
+
+    def position(i, j):
+        return i * cells_per_row + j - origin(i)
+
+    return int(prev[m - origin(n)]), partial(_traceback, dirs, position, n, m)
+
+
+def _first_row(cols, m, scheme: ScoringScheme) -> np.ndarray:
+    """Row 0 at the given columns: a gap of length j costs gap_open + j * gap_extend"""
+    gaps = np.where(cols == 0, 0, scheme.gap_open + cols * scheme.gap_extend)
+    return np.where((cols >= 0) & (cols <= m), gaps, _INF).astype(np.int32)
+
+
+def _next_row(prev, best, sub_row, i, row_origin, shift, indel_penalty, m, steps):
+    """
+    Compute row i of the matrix into best from row i - 1 (prev), both starting at their origin
+    (see _fill). shift is 1 when prev starts one column left of best (banded), 0 otherwise.
+    sub_row[k] is the substitution score for the cell at position k of row i.
+    """
+    g = np.int32(indel_penalty)
+    if shift:
+        np.add(prev, sub_row, out=best)
+        np.minimum(best[:-1], prev[1:] + g, out=best[:-1])
+    else:
+        best[0] = _INF
+        np.add(prev[:-1], sub_row[1:], out=best[1:])
+        np.minimum(best, prev + g, out=best)
+
+    width = len(best)
+    lo = max(0, -row_origin)
+    hi = min(width, m - row_origin + 1)
+    if lo < width and row_origin <= 0:
+        # Column 0 is only reachable from above
+        best[lo] = i * indel_penalty
+    best -= steps
+    np.minimum.accumulate(best, out=best)
+    best += steps
+    best[:lo] = _INF
+    best[hi:] = _INF
+
+
+def _block_directions(scores, subs, g, shift, origins):
+    """
+    Packed traceback directions for a block of filled rows (scores[0] is the row above the block),
+    breaking ties diagonal, then left, then up like the original traceback.
+    """
+    prev, best = scores[:-1], scores[1:]
+    diag = np.full(best.shape, _INF, dtype=np.int32)
+    if shift:
+        np.add(prev, subs, out=diag)
+    else:
+        np.add(prev[:, :-1], subs[:, 1:], out=diag[:, 1:])
+    left = np.full(best.shape, _INF, dtype=np.int32)
+    np.add(best[:, :-1], g, out=left[:, 1:])
+
+    row = np.where(diag == best, DIAG, np.where(left == best, LEFT, UP)).astype(np.uint8)
+    for r, o in enumerate(origins):
+        if o <= 0 < o + best.shape[1]:
+            row[r, -o] = UP
+
+    return _pack(row)
+
+
+def _fill_wavefront(a, b, scheme: ScoringScheme, banded_width=-1):
+    """
+    Fill the Needleman-Wunsch matrix one anti-diagonal (i + j = d) at a time.
+    Every cell on a diagonal depends only on the previous two diagonals,
+    so each diagonal is a handful of whole-vector operations with no scan.
+    Returns the cost and traceback function like _fill.
+
+    Diagonal scores are kept in three rolling buffers indexed by i.
+    Directions for diagonal d are stored starting at i = base(d): its first cell,
+    max(0, d - m), for the full matrix, (d - banded_width) // 2 inside a band.
+    Each diagonal's packed directions start at byte offsets[d] and cover only its own cells,
+    so the full matrix takes about (n + 1) * (m + 1) / 4 bytes, like _fill.
+    """
+    n, m = len(a), len(b)
+    indel_penalty = scheme.gap_extend
+    g = np.int32(indel_penalty)
+    banded = banded_width != -1
+    width = banded_width + 2 if banded else min(n, m) + 1
+    reversed_b = b[::-1]
+
+    def base(d):
+        return (d - banded_width) // 2 if banded else max(0, d - m)
+
+    def cell_range(d):
+        lo, hi = max(0, d - m), min(n, d)
+        if banded:
+            lo, hi = max(lo, -((banded_width - d) // 2)), min(hi, (d + banded_width) // 2)
+        return lo, hi
+
+    diagonals = n + m + 1
+    packed_width = -(-width // 4)
+    if banded:
+        offsets = np.arange(diagonals + 1) * packed_width
+    else:
+        ds = np.arange(diagonals)
+        diagonal_bytes = (np.minimum(n, ds) - np.maximum(0, ds - m) + 4) // 4
+        offsets = np.zeros(diagonals + 1, dtype=np.int64)
+        np.cumsum(diagonal_bytes, out=offsets[1:])
+    dirs = np.empty(offsets[-1], dtype=np.uint8)
+    block_diagonals = max(1, min(diagonals, (1 << 20) // width))
+    block = np.full((block_diagonals, width), UP, dtype=np.uint8)
+
+    def store(first, rows):
+        """Pack the block rows of diagonals first, first + 1, ... into dirs, each cut to its own bytes"""
+        packed = _pack(rows)
+        if not banded:
+            packed = packed[np.arange(packed_width) < diagonal_bytes[first:first + len(rows), None]]
+        dirs[offsets[first]:offsets[first + len(rows)]] = packed.reshape(-1)
+
+    # Rotated at the top of the loop, so cur starts out as diagonal 0
+    before, prev, cur = (np.full(n + 1, _INF, dtype=np.int32) for _ in range(3))
+    cur[0] = 0
+
+    for d in range(1, diagonals):
+        if d % block_diagonals == 0:
+            store(d - block_diagonals, block)
+        row = block[d % block_diagonals]
+        before, prev, cur = prev, cur, before
+        lo, hi = cell_range(d)
+
+        # Interior cells have both i >= 1 and j >= 1
+        first, last = max(lo, 1), min(hi, d - 1)
+        if first <= last:
+            diag = before[first - 1:last] + scheme.substitution(
+                a[first - 1:last], reversed_b[m - d + first:m - d + last + 1])
+            left = prev[first:last + 1] + g
+            best = np.minimum(np.minimum(diag, prev[first - 1:last] + g), left)
+            cur[first:last + 1] = best
+            row[first - base(d):last + 1 - base(d)] = np.where(diag == best, DIAG, np.where(left == best, LEFT, UP))
+
+        if lo == 0:
+            cur[0] = d * indel_penalty
+            row[-base(d)] = LEFT
+        if hi == d:
+            cur[d] = d * indel_penalty
+            row[d - base(d)] = UP
+
+        # Later diagonals read at most one cell past either end of this one
+        if lo > 0:
+            cur[lo - 1] = _INF
+        if hi < n:
+            cur[hi + 1] = _INF
+
+    done = (diagonals - 1) // block_diagonals * block_diagonals
+    store(done, block[:diagonals - done])
+
+    if banded:
+        cells_per_diagonal = packed_width * 4
+
+        def position(i, j):
+            return (i + j) * cells_per_diagonal + i - base(i + j)
+    else:
+        starts = (offsets * 4).tolist()
+
+        def position(i, j):
+            return starts[i + j] + i - base(i + j)
+
+    return int(cur[n]) if n + m else 0, partial(_traceback, dirs, position, n, m)
+
+
+BACKENDS = {
+    'rows': _fill,
+    'wavefront': _fill_wavefront,
+}
+
+
+def _pack(directions: np.ndarray, cells: int | None = None) -> np.ndarray:
+    """
+    Pack rows of directions (0-2) four to a byte, first cell in the low bits.
+    Rows are padded to cells cells (default: the next multiple of 4).
+    """
+    rows, width = directions.shape
+    quads = np.zeros((rows, cells or -(-width // 4) * 4), dtype=np.uint8)
+    quads[:, :width] = directions
+    quads = quads.reshape(rows, -1, 4)
+    return quads[..., 0] | (quads[..., 1] << 2) | (quads[..., 2] << 4) | (quads[..., 3] << 6)
+
+
+# Edit operations, as bytes
+_MATCH = ord('M')
+_INSERT = ord('I')
+_DELETE = ord('D')
+
+
+def _traceback(dirs, position, n, m) -> bytearray:
+    """
+    Walk the packed directions back from the bottom-right corner (n, m),
+    collecting one edit operation per step, and return them in forward order.
+    position(i, j) is the index of cell (i, j) among the 2-bit directions.
+    """
+    cells = memoryview(np.ascontiguousarray(dirs)).cast('B')
+
+    ops = bytearray()
+    i = n
+    j = m
+
+    while i > 0 or j > 0:
+        p = position(i, j)
+        direction = (cells[p >> 2] >> ((p & 3) << 1)) & 3
+
+        if direction == DIAG:
+            ops.append(_MATCH)
+            i -= 1
+            j -= 1
+        elif direction == LEFT:
+            ops.append(_DELETE)
+            j -= 1
+        else:
+            ops.append(_INSERT)
+            i -= 1
+
+    ops.reverse()
+    return ops
+
+
+def align_linear_space(seq1: str, seq2: str, match_award=-3, indel_penalty=5,
+        sub_penalty=1, gap='-', scheme: ScoringScheme | None = None) -> tuple[float, str, str]:
+    """
+        Unbanded alignment in O(len(seq1) + len(seq2)) memory using Hirschberg's divide and conquer.
+        Scores are the same as align(seq1, seq2); the alignment is optimal,
+        but where several alignments tie it may pick a different one than align.
+        :param seq1: the first sequence to align; should be on the "left" of the matrix
+        :param seq2: the second sequence to align; should be on the "top" of the matrix
+        :param match_award: how many points to award a match
+        :param indel_penalty: how many points to award a gap in either sequence
+        :param sub_penalty: how many points to award a substitution
         :param gap: the character to use to represent gaps in the alignment strings
+        :param scheme: substitution matrix and gap costs (see scoring.py); gaps must be linear (gap_open=0)
         :return: alignment cost, alignment 1, alignment 2
     """
+    scheme = scheme or linear_scheme(match_award, indel_penalty, sub_penalty)
+    if scheme.gap_open:
+        raise ValueError('align_linear_space only supports linear gaps (gap_open=0)')
+    a = scheme.encode(seq1)
+    b = scheme.encode(seq2)
+
+    ops = bytearray()
+    cost = _hirschberg(a, b, scheme, ops)
+    return (cost, *apply_ops(ops.decode('ascii'), seq1, seq2, gap))
+
+
+# Subproblems at or below this many cells are aligned directly with _fill
+_HIRSCHBERG_BASE_CELLS = 1 << 20
+
+
+def _hirschberg(a, b, scheme: ScoringScheme, ops: bytearray) -> int:
+    """
+    Append the edit operations of an optimal alignment of a against b (encoded sequences) to ops
+    and return its cost
+    """
+    n, m = len(a), len(b)
+
+    if n == 0 or m == 0:
+        ops += bytes([_INSERT]) * n + bytes([_DELETE]) * m
+        return (n + m) * scheme.gap_extend
+
+    if n * m <= _HIRSCHBERG_BASE_CELLS or n == 1:
+        cost, traceback = _fill(a, b, scheme)
+        ops += traceback()
+        return cost
+
+    # Cheapest column to cross the middle row: forward scores of the top half
+    # plus backward scores of the bottom half
+    mid = n // 2
+    forward = _last_row(a[:mid], b, scheme)
+    backward = _last_row(a[mid:][::-1], b[::-1], scheme)
+    costs = forward + backward[::-1]
+    split = int(np.argmin(costs))
+
+    _hirschberg(a[:mid], b[:split], scheme, ops)
+    _hirschberg(a[mid:], b[split:], scheme, ops)
+    return int(costs[split])
+
+
+def _last_row(a, b, scheme: ScoringScheme, banded_width=-1, edges=None) -> np.ndarray:
+    """
+    Bottom row of the Needleman-Wunsch (or, with a gap_open, Gotoh) matrix in _fill's row layout,
+    keeping only two rows at a time.
+    Each distinct character of a gets its substitution scores against b computed once,
+    and every row slices its scores out of that profile.
+    If given, edges[0, i] and edges[1, i] are set to the first and last stored score of row i.
+    """
+    m = len(b)
+    if banded_width == -1:
+        width, shift = m + 1, 0
+    else:
+        width, shift = 2 * banded_width + 1, 1
+
+    def origin(i):
+        return 0 if shift == 0 else i - banded_width
+
+    steps = np.arange(width, dtype=np.int32) * np.int32(scheme.gap_extend)
+    padded_b = np.zeros(m + 2 * width + 2, dtype=b.dtype)
+    padded_b[width + 1:width + 1 + m] = b
+    profiles = {c: scheme.substitution(c, padded_b) for c in np.unique(a).tolist()}
+
+    prev = _first_row(np.arange(width) + origin(0), m, scheme)
+    best = np.empty(width, dtype=np.int32)
+    if scheme.gap_open:
+        prev_up_gap = np.full(width, _INF, dtype=np.int32)
+        left_gap, up_gap = np.empty(width, dtype=np.int32), np.empty(width, dtype=np.int32)
+    if edges is not None:
+        edges[:, 0] = prev[0], prev[-1]
+
+    for i, c in enumerate(a.tolist(), start=1):
+        start = origin(i) + width
+        sub_row = profiles[c][start:start + width]
+        if scheme.gap_open:
+            _next_row_affine(prev, prev_up_gap, best, left_gap, up_gap, sub_row, origin(i), shift, scheme, m, steps)
+            prev_up_gap, up_gap = up_gap, prev_up_gap
+        else:
+            _next_row(prev, best, sub_row, i, origin(i), shift, scheme.gap_extend, m, steps)
+        prev, best = best, prev
+        if edges is not None:
+            edges[:, i] = prev[0], prev[-1]
+
+    return prev
+
+
+def _fill_affine(a, b, scheme: ScoringScheme, banded_width=-1):
+    """
+    Fill the three Gotoh matrices for affine gaps a block of rows at a time, in _fill's row layout:
+    H (best cost), E (alignments ending in a gap in seq1, moving left)
+    and F (ending in a gap in seq2, moving up).
+    Like _fill, the scores are reduced to directions block by block:
+    a 2-bit direction for H (diagonal, from E, from F) and one bit each for E and F
+    saying whether the gap is extended (rather than opened from H).
+    Returns the cost and a function that traces the alignment back as edit operations.
+    """
+    n, m = len(a), len(b)
+    if banded_width == -1:
+        width, shift = m + 1, 0
+    else:
+        width, shift = 2 * banded_width + 1, 1
+
+    def origin(i):
+        return 0 if shift == 0 else i - banded_width
+
+    ks = np.arange(width, dtype=np.int32)
+    steps = ks * np.int32(scheme.gap_extend)
+    padded_b = np.zeros(m + 2 * width + 2, dtype=b.dtype)
+    padded_b[width + 1:width + 1 + m] = b
+
+    # A multiple of 8 cells per row, so the 2-bit and 1-bit arrays share positions
+    cells_per_row = -(-width // 8) * 8
+    dirs = np.empty((n + 1, cells_per_row // 4), dtype=np.uint8)
+    left_extends = np.empty((n + 1, cells_per_row // 8), dtype=np.uint8)
+    up_extends = np.empty((n + 1, cells_per_row // 8), dtype=np.uint8)
+    block_rows = max(1, min(n, (1 << 20) // width))
+
+    prev = _first_row(ks + origin(0), m, scheme)
+    prev_up_gap = np.full(width, _INF, dtype=np.int32)
+    cols = ks + origin(0)
+    dirs[0] = _pack(np.full((1, width), LEFT, dtype=np.uint8), cells_per_row)
+    left_extends[0] = _pack_bits((cols >= 2)[None, :], cells_per_row)
+    up_extends[0] = 0
+
+    for start in range(1, n + 1, block_rows):
+        rows = range(start, min(n + 1, start + block_rows))
+        origins = np.array([origin(i) for i in rows], dtype=np.int64)
+        subs = scheme.substitution(a[start - 1:rows[-1], None], padded_b[origins[:, None] + (width + ks)])
+
+        best = np.empty((len(rows) + 1, width), dtype=np.int32)
+        left_gap = np.empty((len(rows), width), dtype=np.int32)
+        up_gap = np.empty((len(rows) + 1, width), dtype=np.int32)
+        best[0] = prev
+        up_gap[0] = prev_up_gap
+        for r, i in enumerate(rows, start=1):
+            _next_row_affine(best[r - 1], up_gap[r - 1], best[r], left_gap[r - 1], up_gap[r],
+                             subs[r - 1], origin(i), shift, scheme, m, steps)
+
+        block = slice(start, start + len(rows))
+        dirs[block], left_extends[block], up_extends[block] = _block_directions_affine(
+            best, left_gap, up_gap[1:], subs, scheme, shift, cells_per_row)
+        prev = best[-1].copy()
+        prev_up_gap = up_gap[-1].copy()
+
+    def position(i, j):
+        return i * cells_per_row + j - origin(i)
+
+    traceback = partial(_traceback_affine, dirs, left_extends, up_extends, position, n, m)
+    return int(prev[m - origin(n)]), traceback
+
+
+def _next_row_affine(prev, prev_up_gap, best, left_gap, up_gap, sub_row, row_origin, shift, scheme, m, steps):
+    """
+    Compute row i of H, E (left_gap) and F (up_gap) from row i - 1 of H and F; layout as in _next_row.
+    E has the same left-to-right dependency as the linear case; since opening a gap
+    never costs less than extending one, E[j] = gap_open + min over k < j of (T[k] + (j-k) * gap_extend)
+    where T = min(diagonal, F) - again one np.minimum.accumulate per row.
+    """
+    g = np.int32(scheme.gap_extend)
+    open_g = np.int32(scheme.gap_open + scheme.gap_extend)
+    if shift:
+        np.minimum(prev_up_gap[1:] + g, prev[1:] + open_g, out=up_gap[:-1])
+        up_gap[-1] = _INF
+        np.add(prev, sub_row, out=best)
+    else:
+        np.minimum(prev_up_gap + g, prev + open_g, out=up_gap)
+        best[0] = _INF
+        np.add(prev[:-1], sub_row[1:], out=best[1:])
+    np.minimum(best, up_gap, out=best)
+
+    left_gap[0] = _INF
+    left_gap[1:] = np.minimum.accumulate(best - steps)[:-1] + steps[1:] + np.int32(scheme.gap_open)
+    np.minimum(best, left_gap, out=best)
+
+    lo = max(0, -row_origin)
+    hi = min(len(best), m - row_origin + 1)
+    for row in (best, left_gap, up_gap):
+        row[:lo] = _INF
+        row[hi:] = _INF
+
+
+def _block_directions_affine(best, left_gap, up_gap, subs, scheme, shift, cells_per_row):
+    """
+    Packed H directions and E/F extend bits for a block of rows (best[0] is the row above the block).
+    Ties go diagonal, then E, then F for H, and to opening a gap over extending one.
+    """
+    prev, best = best[:-1], best[1:]
+    open_g = np.int32(scheme.gap_open + scheme.gap_extend)
+
+    diag = np.full(best.shape, _INF, dtype=np.int32)
+    up = np.full(best.shape, _INF, dtype=np.int32)
+    if shift:
+        np.add(prev, subs, out=diag)
+        up[:, :-1] = prev[:, 1:]
+    else:
+        np.add(prev[:, :-1], subs[:, 1:], out=diag[:, 1:])
+        up[:] = prev
+    directions = np.where(diag == best, DIAG, np.where(left_gap == best, LEFT, UP)).astype(np.uint8)
+
+    left_extends = np.ones(best.shape, dtype=bool)
+    left_extends[:, 1:] = best[:, :-1] + open_g != left_gap[:, 1:]
+    up_extends = up + open_g != up_gap
+
+    return (_pack(directions, cells_per_row),
+            _pack_bits(left_extends, cells_per_row), _pack_bits(up_extends, cells_per_row))
+
+
+def _pack_bits(flags: np.ndarray, cells: int) -> np.ndarray:
+    """Pack rows of booleans eight to a byte, first cell in the low bit, rows padded to cells cells"""
+    padded = np.zeros((len(flags), cells), dtype=bool)
+    padded[:, :flags.shape[1]] = flags
+    return np.packbits(padded, axis=1, bitorder='little')
+
+
+def _traceback_affine(dirs, left_extends, up_extends, position, n, m) -> bytearray:
+    """
+    Walk the Gotoh directions back from (n, m), switching between H, E and F,
+    and return the edit operations in forward order
+    """
+    cells = memoryview(np.ascontiguousarray(dirs)).cast('B')
+    left_bits = memoryview(np.ascontiguousarray(left_extends)).cast('B')
+    up_bits = memoryview(np.ascontiguousarray(up_extends)).cast('B')
+
+    ops = bytearray()
+    i = n
+    j = m
+    state = DIAG
+
+    while i > 0 or j > 0:
+        p = position(i, j)
+        if state == DIAG:
+            state = (cells[p >> 2] >> ((p & 3) << 1)) & 3
+            if state == DIAG:
+                ops.append(_MATCH)
+                i -= 1
+                j -= 1
+                continue
+
+        if state == LEFT:
+            ops.append(_DELETE)
+            j -= 1
+            if not (left_bits[p >> 3] >> (p & 7)) & 1:
+                state = DIAG
+        else:
+            ops.append(_INSERT)
+            i -= 1
+            if not (up_bits[p >> 3] >> (p & 7)) & 1:
+                state = DIAG
+
+    ops.reverse()
+    return ops
+
+
+def align_dict(seq1: str, seq2: str, match_award=-3, indel_penalty=5,
+        sub_penalty=1, banded_width=-1,gap='-') -> tuple[float, str | None, str | None]:
+    """
+        Original Needleman-Wunsch implementation with the matrix in a dict keyed by (i, j).
+        Same parameters and results as align; kept as a reference for tests and benchmarks.
+    """
     left_size = len(seq1)
     top_size = len(seq2)
 
@@ -26,7 +752,7 @@ def align(seq1: str, seq2: str, match_award=-3, indel_penalty=5,
 
         for i in range(1, left_size + 1):
             for j in range(1, top_size + 1):
-                adder(matrix, seq1, seq2, i , j)
+                adder(matrix, seq1, seq2, i , j, match_award, indel_penalty, sub_penalty)
     else:
         for i in range(1, banded_width + 1):
             matrix[(i, 0)] = i * indel_penalty
@@ -35,7 +761,7 @@ def align(seq1: str, seq2: str, match_award=-3, indel_penalty=5,
 
         for i in range(1, left_size + 1):
             for j in range(max(1, i - banded_width), min(top_size+1, i + banded_width + 1)):
-                adder(matrix, seq1, seq2, i , j)
+                adder(matrix, seq1, seq2, i , j, match_award, indel_penalty, sub_penalty)
 
     alignment_cost = matrix[(left_size, top_size)]
 
@@ -79,7 +805,3 @@ def adder(matrix, seq1: str, seq2: str,i, j, match_award=-3, indel_penalty=5,
     left = matrix.get((i, j-1), float('inf')) + indel_penalty
 
     matrix[(i, j)] = min(match, above, left)
-
-
-
-
@@ -0,0 +1,130 @@
+import json
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+from alignment import align
+from sequences import load_sequence, read_records
+
+# Pairs are grouped into chunks of roughly this many matrix cells before being
+# sent to a worker, so tiny pairs don't each pay a round trip through the pool
+CHUNK_CELLS = 1 << 22
+
+
+def align_many(pairs: Iterable[tuple[str, str]], workers: int | None = None,
+               **scoring) -> Iterator[tuple[float, str | None, str | None]]:
+    """
+    Align each (seq1, seq2) pair with align(seq1, seq2, **scoring) across a pool of processes.
+    Results are yielded in input order as soon as they (and everything before them) are ready,
+    and only a few chunks per worker are in flight, so pairs can be streamed from a large input.
+    :param pairs: the (seq1, seq2) pairs to align
+    :param workers: number of worker processes; None uses every CPU, 1 aligns in this process
+    :param scoring: keyword arguments for align (match_award, indel_penalty, banded_width, ...)
+    :return: an iterator of (alignment cost, alignment 1, alignment 2), one per pair
+    """
+    chunks = _chunks(pairs, scoring.get('banded_width', -1))
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _align_chunk(chunk, scoring)
+        return
+
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(_align_chunk, chunk, scoring))
+            if len(in_flight) >= 4 * workers:
+                yield from in_flight.popleft().result()
+
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _chunks(pairs: Iterable[tuple[str, str]], banded_width: int | str) -> Iterator[list[tuple[str, str]]]:
+    chunk = []
+    cells = 0
+    for seq1, seq2 in pairs:
+        chunk.append((seq1, seq2))
+        if banded_width == -1 or banded_width == 'adaptive':
+            # an adaptive band can widen to the full matrix, so count it as one
+            cells += len(seq1) * len(seq2)
+        else:
+            cells += len(seq1) * (2 * banded_width + 1)
+
+        if cells >= CHUNK_CELLS:
+            yield chunk
+            chunk = []
+            cells = 0
+
+    if chunk:
+        yield chunk
+
+
+def _align_chunk(chunk: list[tuple[str, str]], scoring: dict) -> list[tuple[float, str | None, str | None]]:
+    return [align(seq1, seq2, **scoring) for seq1, seq2 in chunk]
+
+
+def read_manifest(file: Path | str) -> Iterator[tuple[str, str, str]]:
+    """
+    Yield (name, seq1, seq2) for each line of a tab-separated manifest.
+    Lines are either "seq1<TAB>seq2" or "name<TAB>seq1<TAB>seq2";
+    each sequence is a path to a file holding the sequence, or the sequence itself.
+    Blank lines and lines starting with '#' are skipped.
+    """
+    with Path(file).open() as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+
+            fields = line.split('\t')
+            if len(fields) == 2:
+                fields = [str(line_number)] + fields
+            if len(fields) != 3:
+                raise ValueError(f'{file}:{line_number}: expected 2 or 3 tab-separated fields, got {len(fields)}')
+
+            name, seq1, seq2 = fields
+            yield name, _sequence(seq1), _sequence(seq2)
+
+
+def _sequence(could_be_path: str) -> str | bytearray:
+    if (file := Path(could_be_path)).is_file():
+        return load_sequence(file)
+    # assume it's the sequence string, not a file name
+    return could_be_path
+
+
+def fasta_jobs(queries: Path | str, reference: Path | str) -> Iterator[tuple[str, bytearray, bytearray]]:
+    """
+    Yield (name, query, reference) to align every record of the queries FASTA
+    against the first record of the reference FASTA
+    """
+    reference_sequence = load_sequence(reference)
+    for name, query in read_records(queries):
+        yield name, query, reference_sequence
+
+
+def write_json_lines(jobs: Iterable[tuple[str, str, str]], out: TextIO, workers: int | None = None, **scoring):
+    """
+    Align each (name, seq1, seq2) job and write one JSON object per line to out, in input order
+    """
+    names = deque()
+
+    def pairs():
+        for name, seq1, seq2 in jobs:
+            names.append(name)
+            yield seq1, seq2
+
+    for score, alignment1, alignment2 in align_many(pairs(), workers=workers, **scoring):
+        record = {
+            'name': names.popleft(),
+            # an out-of-band alignment costs inf, which JSON can't represent
+            'score': None if score == math.inf else score,
+            'alignment1': alignment1,
+            'alignment2': alignment2,
+        }
+        out.write(json.dumps(record) + '\n')
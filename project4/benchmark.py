@@ -0,0 +1,278 @@
+import json
+import math
+import platform
+import random
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+import alignment
+from scoring import linear_scheme
+from sequences import load_sequence
+
+TEST_FILES = Path(__file__).parent / 'test_files'
+
+# name, length of each genome prefix, banded_width
+CASES = [
+    ('large', 3000, -1),
+    ('large_banded', 3000, 3),
+    ('massive_banded', 31000, 3),
+    ('massive', 31000, -1),
+]
+
+# label: (function in alignment, extra keyword arguments)
+IMPLEMENTATIONS = {
+    'align_dict': ('align_dict', {}),
+    'rows': ('align', {'backend': 'rows'}),
+    'wavefront': ('align', {'backend': 'wavefront'}),
+    'score_only': ('align', {'score_only': True}),
+    # stands in for the full matrix, so only run on the unbanded cases
+    'adaptive': ('align', {'banded_width': 'adaptive'}),
+}
+
+# The suite: align on generated pairs of each length, full and with each banded_width,
+# plus the graded test_files cases
+SUITE_LENGTHS = [100, 300, 1_000, 3_000, 10_000, 30_000]
+SUITE_BANDS = [-1, 3, 100]
+SUITE_FILE_CASES = [case for case in CASES if case[0] != 'massive']
+
+# A suite result more than this fraction slower (or larger) than the baseline is a regression,
+# once past the absolute noise allowed for each metric (timer jitter on the tiny cases)
+DEFAULT_THRESHOLD = 0.25
+NOISE = {'seconds': 0.01, 'peak_memory_mb': 0.5}
+
+# The dict implementation manages ~300k cells/s and ~150 bytes/cell; skip it beyond this
+DICT_MAX_CELLS = 10 ** 8
+
+
+def cell_count(n: int, m: int, banded_width: int) -> int:
+    """Number of matrix cells the fill computes"""
+    if banded_width == -1:
+        return n * m
+    return sum(min(m, i + banded_width) - max(1, i - banded_width) + 1 for i in range(1, n + 1))
+
+
+def _run(implementation: str, length: int, banded_width: int) -> dict:
+    """Time one alignment; runs in a fresh worker process so ru_maxrss is this run's peak"""
+    seq1 = load_sequence(TEST_FILES / 'bovine_coronavirus.txt')[:length]
+    seq2 = load_sequence(TEST_FILES / 'murine_hepatitus.txt')[:length]
+
+    function, kwargs = IMPLEMENTATIONS[implementation]
+    if function == 'align_dict':
+        # The original implementation builds its strings character by character
+        seq1, seq2 = seq1.decode('ascii'), seq2.decode('ascii')
+    kwargs = {'banded_width': banded_width, **kwargs}
+    if 'backend' in kwargs:
+        score, phases = _run_phases(seq1, seq2, **kwargs)
+        elapsed = sum(phases.values())
+    else:
+        start = perf_counter()
+        score, _, _ = getattr(alignment, function)(seq1, seq2, **kwargs)
+        elapsed = perf_counter() - start
+        phases = {}
+
+    return {
+        'score': score,
+        'seconds': elapsed,
+        'phases': phases,
+        'cells_per_second': cell_count(len(seq1), len(seq2), banded_width) / elapsed,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def _peak_rss_mb() -> float | None:
+    """This process's peak resident memory, or None where the resource module is unavailable (Windows)"""
+    if sys.platform == 'win32':
+        return None
+    import resource
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    scale = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _run_phases(seq1: str, seq2: str, banded_width: int, backend: str) -> tuple[int, dict]:
+    """The steps of align, timed separately: matrix fill, traceback to edit operations, gapped strings"""
+    phases = {}
+
+    start = perf_counter()
+    scheme = linear_scheme()
+    a, b = scheme.encode(seq1), scheme.encode(seq2)
+    score, traceback = alignment.BACKENDS[backend](a, b, scheme, banded_width)
+    phases['fill'] = perf_counter() - start
+
+    start = perf_counter()
+    ops = traceback().decode('ascii')
+    phases['traceback'] = perf_counter() - start
+
+    start = perf_counter()
+    alignment.apply_ops(ops, seq1, seq2)
+    phases['render'] = perf_counter() - start
+
+    return score, phases
+
+
+def generated_pair(length: int, seed: int = 312) -> tuple[str, str]:
+    """
+    A random DNA sequence and a copy with ~10% of its positions substituted, deleted or followed by an insertion,
+    trimmed or padded to the same length
+    """
+    rng = random.Random(f'{seed}-{length}')
+    seq1 = ''.join(rng.choices('ACGT', k=length))
+    seq2 = []
+    for c in seq1:
+        edit = rng.random()
+        if edit < 0.033:
+            seq2.append(rng.choice('ACGT'))
+        elif edit < 0.066:
+            continue
+        elif edit < 0.1:
+            seq2.append(c + rng.choice('ACGT'))
+        else:
+            seq2.append(c)
+    # Same length, so every band holds the corner
+    seq2 = ''.join(seq2)[:length]
+    return seq1, seq2 + ''.join(rng.choices('ACGT', k=length - len(seq2)))
+
+
+def suite_cases(lengths: list[int], bands: list[int]):
+    """Yield (name, seq1, seq2, banded_width) for every suite measurement"""
+    for length in lengths:
+        seq1, seq2 = generated_pair(length)
+        for banded_width in bands:
+            yield f'generated-{length}/{_band_label(banded_width)}', seq1, seq2, banded_width
+
+    for name, length, banded_width in SUITE_FILE_CASES:
+        seq1 = load_sequence(TEST_FILES / 'bovine_coronavirus.txt')[:length]
+        seq2 = load_sequence(TEST_FILES / 'murine_hepatitus.txt')[:length]
+        yield f'{name}/{_band_label(banded_width)}', seq1, seq2, banded_width
+
+
+def _band_label(banded_width: int) -> str:
+    return 'full' if banded_width == -1 else f'band{banded_width}'
+
+
+def measure(seq1, seq2, banded_width: int, repeat: int = 1) -> dict:
+    """
+    Time align (best of repeat runs), then run it once more under tracemalloc for its peak memory;
+    tracing slows allocation down, so it is kept out of the timed runs
+    """
+    seconds = math.inf
+    for _ in range(repeat):
+        start = perf_counter()
+        score, _, _ = alignment.align(seq1, seq2, banded_width=banded_width)
+        seconds = min(seconds, perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        alignment.align(seq1, seq2, banded_width=banded_width)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    cells = cell_count(len(seq1), len(seq2), banded_width)
+    return {
+        'lengths': [len(seq1), len(seq2)],
+        'banded_width': banded_width,
+        'score': score,
+        'seconds': seconds,
+        'cells': cells,
+        'cells_per_second': cells / seconds,
+        'peak_memory_mb': peak / 2 ** 20,
+    }
+
+
+def run_suite(lengths: list[int], bands: list[int], repeat: int = 1) -> dict:
+    """Measure every suite case, printing each as it finishes; returns the JSON report"""
+    print(f'{"case":<28}{"score":>8}{"seconds":>10}{"cells/s":>14}{"peak MB":>10}')
+    results = {}
+    for name, seq1, seq2, banded_width in suite_cases(lengths, bands):
+        result = results[name] = measure(seq1, seq2, banded_width, repeat)
+        print(f'{name:<28}{result["score"]:>8}{result["seconds"]:>10.3f}'
+              f'{result["cells_per_second"]:>14,.0f}{result["peak_memory_mb"]:>10.1f}')
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def regressions(report: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Descriptions of every case whose time or peak memory exceeds the baseline's by more than threshold
+    (a fraction, plus NOISE), or whose score differs; cases missing from either report are skipped
+    """
+    problems = []
+    for name, result in report['results'].items():
+        if (expected := baseline['results'].get(name)) is None:
+            continue
+        if result['score'] != expected['score']:
+            problems.append(f'{name}: score {result["score"]} != baseline {expected["score"]}')
+        for metric, noise in NOISE.items():
+            if result[metric] > expected[metric] * (1 + threshold) + noise:
+                problems.append(f'{name}: {metric} {result[metric]:.3f} vs baseline {expected[metric]:.3f} '
+                                f'(+{result[metric] / expected[metric] - 1:.0%})')
+    return problems
+
+
+def suite_main(lengths: list[int], bands: list[int], repeat: int, report_file: Path | None,
+               baseline_file: Path | None, threshold: float) -> int:
+    """Run the suite, write its report, and compare it to the baseline; returns the exit status"""
+    report = run_suite(lengths, bands, repeat)
+    if report_file:
+        report_file.write_text(json.dumps(report, indent=2) + '\n')
+
+    if baseline_file:
+        problems = regressions(report, json.loads(baseline_file.read_text()), threshold)
+        for problem in problems:
+            print(f'REGRESSION {problem}')
+        if problems:
+            return 1
+        print(f'No regressions beyond {threshold:.0%} of {baseline_file}')
+    return 0
+
+
+def main(cases: list[str]):
+    print(f'{"case":<16}{"implementation":<16}{"score":>8}{"seconds":>10}{"cells/s":>14}{"peak RSS MB":>13}'
+          f'{"fill":>9}{"traceback":>11}{"render":>9}')
+    for name, length, banded_width in CASES:
+        if cases and name not in cases:
+            continue
+        for implementation, (_, kwargs) in IMPLEMENTATIONS.items():
+            if banded_width != -1 and 'banded_width' in kwargs:
+                continue
+            if implementation == 'align_dict' and cell_count(length, length, banded_width) > DICT_MAX_CELLS:
+                print(f'{name:<16}{implementation:<16}{"(skipped: too many cells)":>33}')
+                continue
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result = pool.submit(_run, implementation, length, banded_width).result()
+            phases = result['phases']
+            rss = f'{result["peak_rss_mb"]:>13.1f}' if result['peak_rss_mb'] is not None else f'{"-":>13}'
+            print(f'{name:<16}{implementation:<16}{result["score"]:>8}{result["seconds"]:>10.3f}'
+                  f'{result["cells_per_second"]:>14,.0f}{rss}'
+                  + ''.join(f'{phases[phase]:>{w}.3f}' if phases else f'{"-":>{w}}'
+                            for phase, w in [('fill', 9), ('traceback', 11), ('render', 9)]))
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Compare the align backends against the dict-backed original, '
+                                        'or (--suite) measure align\'s scaling against a baseline')
+    parser.add_argument('cases', nargs='*', help=f'Cases to run (default all): {", ".join(c[0] for c in CASES)}')
+    suite_args = parser.add_argument_group('suite')
+    suite_args.add_argument('--suite', action='store_true', help='Run the scaling suite instead of the comparison')
+    suite_args.add_argument('--lengths', type=int, nargs='+', default=SUITE_LENGTHS, help='Generated sequence lengths')
+    suite_args.add_argument('--bands', type=int, nargs='+', default=SUITE_BANDS, help='banded_width values; -1 is full')
+    suite_args.add_argument('--repeat', type=int, default=1, help='Timed runs per case; the fastest is kept')
+    suite_args.add_argument('--report', type=Path, help='Write the JSON report here (use it as a later --baseline)')
+    suite_args.add_argument('--baseline', type=Path, help='Fail if a case regresses against this report')
+    suite_args.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help=f'Allowed slowdown/growth as a fraction (default {DEFAULT_THRESHOLD})')
+    args = parser.parse_args()
+
+    if args.suite:
+        sys.exit(suite_main(args.lengths, args.bands, args.repeat, args.report, args.baseline, args.threshold))
+    main(args.cases)
@@ -1,14 +1,20 @@
+import sys
 from argparse import ArgumentParser
 from pathlib import Path
 
-from alignment import align
+from alignment import align, align_linear_space
+from batch import read_manifest, fasta_jobs, write_json_lines
+from sequences import load_sequence
 
 
-def main(seq1: str, seq2: str):
+def main(seq1: str, seq2: str, linear_space: bool = False):
     """
     Align the two sequences and print the score and alignment strings
     """
-    score, alignment1, alignment2 = align(seq1, seq2, banded_width = 3)
+    if linear_space:
+        score, alignment1, alignment2 = align_linear_space(seq1, seq2)
+    else:
+        score, alignment1, alignment2 = align(seq1, seq2, banded_width = 3)
     print(f'Score: {score}')
     print(alignment1)
     print(alignment2)
@@ -16,19 +22,44 @@ def main(seq1: str, seq2: str):
 
 def _content_or_string(could_be_path):
     if (s1file := Path(could_be_path)).exists():
-        return s1file.read_text()
+        return load_sequence(s1file)
     else:
         # assume it's the sequence string, not a file name
         return could_be_path
 
 
+def main_batch(jobs, workers: int | None, banded_width: int):
+    """
+    Align every (name, seq1, seq2) job and print one JSON object per line, in input order
+    """
+    write_json_lines(jobs, sys.stdout, workers=workers, banded_width=banded_width)
+
+
 if __name__ == '__main__':
     parser = ArgumentParser()
-    parser.add_argument('seq1_file', help='Path to file containing sequence 1')
-    parser.add_argument('seq2_file', help='Path to file containing sequence 2')
+    parser.add_argument('seq1_file', nargs='?', help='Path to file containing sequence 1')
+    parser.add_argument('seq2_file', nargs='?', help='Path to file containing sequence 2')
+    parser.add_argument('--linear-space', action='store_true',
+                        help='Unbanded alignment in linear memory (Hirschberg); use for whole genomes')
+    batch_args = parser.add_argument_group('batch mode', 'Align many pairs and print JSON lines')
+    batch_args.add_argument('--manifest', help='Tab-separated file of "[name] seq1 seq2" lines (sequences or paths)')
+    batch_args.add_argument('--queries', help='FASTA file of sequences to align against --reference')
+    batch_args.add_argument('--reference', help='FASTA (or plain) file holding the reference sequence')
+    batch_args.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+    batch_args.add_argument('--banded-width', type=int, default=-1, help='Band for batch alignments; -1 for full')
     args = parser.parse_args()
 
-    seq1 = _content_or_string(args.seq1_file)
-    seq2 = _content_or_string(args.seq2_file)
+    if args.manifest:
+        main_batch(read_manifest(args.manifest), args.workers, args.banded_width)
+    elif args.queries or args.reference:
+        if not (args.queries and args.reference):
+            parser.error('--queries and --reference must be given together')
+        main_batch(fasta_jobs(args.queries, args.reference), args.workers, args.banded_width)
+    else:
+        if not (args.seq1_file and args.seq2_file):
+            parser.error('seq1_file and seq2_file are required unless --manifest or --queries is given')
+
+        seq1 = _content_or_string(args.seq1_file)
+        seq2 = _content_or_string(args.seq2_file)
 
-    main(seq1, seq2)
+        main(seq1, seq2, args.linear_space)
@@ -0,0 +1,161 @@
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+# NCBI-format similarity matrices (higher is better); schemes store their negation as costs
+BLOSUM62 = """
+   A  R  N  D  C  Q  E  G  H  I  L  K  M  F  P  S  T  W  Y  V  B  Z  X  *
+A  4 -1 -2 -2  0 -1 -1  0 -2 -1 -1 -1 -1 -2 -1  1  0 -3 -2  0 -2 -1  0 -4
+R -1  5  0 -2 -3  1  0 -2  0 -3 -2  2 -1 -3 -2 -1 -1 -3 -2 -3 -1  0 -1 -4
+N -2  0  6  1 -3  0  0  0  1 -3 -3  0 -2 -3 -2  1  0 -4 -2 -3  3  0 -1 -4
+D -2 -2  1  6 -3  0  2 -1 -1 -3 -4 -1 -3 -3 -1  0 -1 -4 -3 -3  4  1 -1 -4
+C  0 -3 -3 -3  9 -3 -4 -3 -3 -1 -1 -3 -1 -2 -3 -1 -1 -2 -2 -1 -3 -3 -2 -4
+Q -1  1  0  0 -3  5  2 -2  0 -3 -2  1  0 -3 -1  0 -1 -2 -1 -2  0  3 -1 -4
+E -1  0  0  2 -4  2  5 -2  0 -3 -3  1 -2 -3 -1  0 -1 -3 -2 -2  1  4 -1 -4
+G  0 -2  0 -1 -3 -2 -2  6 -2 -4 -4 -2 -3 -3 -2  0 -2 -2 -3 -3 -1 -2 -1 -4
+H -2  0  1 -1 -3  0  0 -2  8 -3 -3 -1 -2 -1 -2 -1 -2 -2  2 -3  0  0 -1 -4
+I -1 -3 -3 -3 -1 -3 -3 -4 -3  4  2 -3  1  0 -3 -2 -1 -3 -1  3 -3 -3 -1 -4
+L -1 -2 -3 -4 -1 -2 -3 -4 -3  2  4 -2  2  0 -3 -2 -1 -2 -1  1 -4 -3 -1 -4
+K -1  2  0 -1 -3  1  1 -2 -1 -3 -2  5 -1 -3 -1  0 -1 -3 -2 -2  0  1 -1 -4
+M -1 -1 -2 -3 -1  0 -2 -3 -2  1  2 -1  5  0 -2 -1 -1 -1 -1  1 -3 -1 -1 -4
+F -2 -3 -3 -3 -2 -3 -3 -3 -1  0  0 -3  0  6 -4 -2 -2  1  3 -1 -3 -3 -1 -4
+P -1 -2 -2 -1 -3 -1 -1 -2 -2 -3 -3 -1 -2 -4  7 -1 -1 -4 -3 -2 -2 -1 -2 -4
+S  1 -1  1  0 -1  0  0  0 -1 -2 -2  0 -1 -2 -1  4  1 -3 -2 -2  0  0  0 -4
+T  0 -1  0 -1 -1 -1 -1 -2 -2 -1 -1 -1 -1 -2 -1  1  5 -2 -2  0 -1 -1  0 -4
+W -3 -3 -4 -4 -2 -2 -3 -2 -2 -3 -2 -3 -1  1 -4 -3 -2 11  2 -3 -4 -3 -2 -4
+Y -2 -2 -2 -3 -2 -1 -2 -3  2 -1 -1 -2 -1  3 -3 -2 -2  2  7 -1 -3 -2 -1 -4
+V  0 -3 -3 -3 -1 -2 -2 -3 -3  3  1 -2  1 -1 -2 -2  0 -3 -1  4 -3 -2 -1 -4
+B -2 -1  3  4 -3  0  1 -1  0 -3 -4  0 -3 -3 -2  0 -1 -4 -3 -3  4  1 -1 -4
+Z -1  0  0  1 -3  3  4 -2  0 -3 -3  1 -1 -3 -1  0 -1 -3 -2 -2  1  4 -1 -4
+X  0 -1 -1 -1 -2 -1 -1 -1 -1 -1 -1 -1 -1 -1 -2  0  0 -2 -1 -1 -1 -1 -1 -4
+* -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4 -4  1
+"""
+
+NUC_4_4 = """
+    A   T   G   C   S   W   R   Y   K   M   B   V   H   D   N
+A   5  -4  -4  -4  -4   1   1  -4  -4   1  -4  -1  -1  -1  -2
+T  -4   5  -4  -4  -4   1  -4   1   1  -4  -1  -4  -1  -1  -2
+G  -4  -4   5  -4   1  -4   1  -4   1  -4  -1  -1  -4  -1  -2
+C  -4  -4  -4   5   1  -4  -4   1  -4   1  -1  -1  -1  -4  -2
+S  -4  -4   1   1  -1  -4  -2  -2  -2  -2  -1  -1  -3  -3  -1
+W   1   1  -4  -4  -4  -1  -2  -2  -2  -2  -3  -3  -1  -1  -1
+R   1  -4   1  -4  -2  -2  -1  -4  -2  -2  -3  -1  -3  -1  -1
+Y  -4   1  -4   1  -2  -2  -4  -1  -2  -2  -1  -3  -1  -3  -1
+K  -4   1   1  -4  -2  -2  -2  -2  -1  -4  -1  -3  -3  -1  -1
+M   1  -4  -4   1  -2  -2  -2  -2  -4  -1  -3  -1  -1  -3  -1
+B  -4  -1  -1  -1  -1  -3  -3  -1  -1  -3  -1  -2  -2  -2  -1
+V  -1  -4  -1  -1  -1  -3  -1  -3  -3  -1  -2  -1  -2  -2  -1
+H  -1  -1  -4  -1  -3  -1  -3  -1  -3  -1  -2  -2  -1  -2  -1
+D  -1  -1  -1  -4  -3  -1  -1  -3  -1  -3  -2  -2  -2  -1  -1
+N  -2  -2  -2  -2  -1  -1  -1  -1  -1  -1  -1  -1  -1  -1  -1
+"""
+
+MATRICES = {
+    'BLOSUM62': BLOSUM62,
+    'NUC.4.4': NUC_4_4,
+}
+
+
+class ScoringScheme:
+    """
+    Costs for aligning two sequences (lower is better, like align's match_award/sub_penalty):
+    a substitution cost for every pair of characters, and gap_open + gap_extend * length for each gap.
+    gap_open == 0 is the linear indel_penalty = gap_extend of align.
+
+    Substitution costs either come from equality (match_award / sub_penalty)
+    or from an integer lookup table indexed by encode()d characters; either way
+    substitution() scores whole arrays of encoded characters in one operation.
+    Use linear_scheme and matrix_scheme, which cache their schemes.
+    """
+
+    def __init__(self, gap_open: int, gap_extend: int,
+                 match_award: int | None = None, sub_penalty: int | None = None,
+                 costs: dict[tuple[str, str], int] | None = None, name: str = ''):
+        if gap_open < 0 or gap_extend < 0:
+            raise ValueError('Gap costs must not be negative')
+        self.gap_open = gap_open
+        self.gap_extend = gap_extend
+        self.match_award = match_award
+        self.sub_penalty = sub_penalty
+        self.name = name
+
+        if costs is None:
+            self.table = None
+            self.min_substitution = min(match_award, sub_penalty)
+            return
+
+        # Characters outside the matrix get their own index, costing the worst substitution
+        alphabet = sorted({c for pair in costs for c in pair})
+        index = {c: k for k, c in enumerate(alphabet)}
+        other = len(alphabet)
+        worst = max(costs.values())
+
+        self.table = np.full((other + 1, other + 1), worst, dtype=np.int32)
+        for (c1, c2), cost in costs.items():
+            self.table[index[c1], index[c2]] = cost
+        self.min_substitution = int(self.table.min())
+
+        # Code point -> table index, case-insensitive
+        letters = {c: k for c, k in index.items()}
+        letters.update({c.lower(): k for c, k in index.items() if c.lower() not in index})
+        self._lookup = np.full(max(map(ord, letters)) + 2, other, dtype=np.uint8 if other < 256 else np.int32)
+        for c, k in letters.items():
+            self._lookup[ord(c)] = k
+
+    def __repr__(self):
+        if self.table is None:
+            return (f'ScoringScheme(match_award={self.match_award}, sub_penalty={self.sub_penalty}, '
+                    f'gap_open={self.gap_open}, gap_extend={self.gap_extend})')
+        return f'ScoringScheme({self.name!r}, gap_open={self.gap_open}, gap_extend={self.gap_extend})'
+
+    def encode(self, seq) -> np.ndarray:
+        """
+        seq as an integer array that substitution() understands.
+        seq is a str, or ASCII bytes (bytes, bytearray or a uint8 array, e.g. from sequences.load_sequence),
+        which an identity scheme uses without copying.
+        """
+        if isinstance(seq, str):
+            code_points = np.frombuffer(seq.encode('utf-32-le'), dtype=np.uint32)
+        else:
+            code_points = np.frombuffer(seq, dtype=np.uint8)
+        if self.table is None:
+            return code_points
+        return self._lookup[np.minimum(code_points, len(self._lookup) - 1)]
+
+    def substitution(self, x, y) -> np.ndarray:
+        """int32 cost of aligning encoded characters x against y, broadcasting like any NumPy operation"""
+        if self.table is None:
+            return np.where(x == y, self.match_award, self.sub_penalty).astype(np.int32)
+        return self.table[x, y]
+
+
+@lru_cache(maxsize=None)
+def linear_scheme(match_award=-3, indel_penalty=5, sub_penalty=1) -> ScoringScheme:
+    """align's match_award/indel_penalty/sub_penalty costs as a scheme"""
+    return ScoringScheme(0, indel_penalty, match_award=match_award, sub_penalty=sub_penalty)
+
+
+@lru_cache(maxsize=None)
+def matrix_scheme(matrix: str = 'NUC.4.4', gap_open: int = 10, gap_extend: int = 1) -> ScoringScheme:
+    """
+    Scheme from a similarity matrix: one of MATRICES by name, or the path of an NCBI-format matrix file.
+    Similarities are negated into costs, so a BLOSUM62 score of 4 costs -4.
+    The matrix is parsed and its lookup table built once per (matrix, gap_open, gap_extend).
+    """
+    text = MATRICES[matrix] if matrix in MATRICES else Path(matrix).read_text()
+    return ScoringScheme(gap_open, gap_extend, costs=_parse_matrix(text), name=matrix)
+
+
+def _parse_matrix(text: str) -> dict[tuple[str, str], int]:
+    """{(row character, column character): cost} from an NCBI-format similarity matrix"""
+    lines = [line.split() for line in text.splitlines() if line.strip() and not line.startswith('#')]
+    columns = lines[0]
+
+    costs = {}
+    for row, *values in lines[1:]:
+        if len(values) != len(columns):
+            raise ValueError(f'Matrix row {row!r} has {len(values)} values for {len(columns)} columns')
+        for column, value in zip(columns, values):
+            costs[row, column] = -int(value)
+    return costs
@@ -0,0 +1,105 @@
+import mmap
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+# 2-bit codes for packed nucleotide storage, and back
+_NUCLEOTIDES = b'ACGT'
+_TWO_BIT = np.full(256, 255, dtype=np.uint8)
+for _code, _c in enumerate(_NUCLEOTIDES):
+    _TWO_BIT[_c] = _TWO_BIT[ord(chr(_c).lower())] = _code
+
+
+def read_records(file: Path | str) -> Iterator[tuple[str, bytearray]]:
+    """
+    Yield (name, sequence) for each record of a FASTA (or plain sequence) file, one record at a time.
+    The file is memory-mapped rather than read, and each sequence is copied once, without line breaks
+    or other whitespace, straight from the mapping into a bytearray.
+    The name is the header line without '>'; a file with no header is a single record named after the file.
+    """
+    file = Path(file)
+    with file.open('rb') as f:
+        if not file.stat().st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from _records(mapped, file.stem)
+
+
+def _records(mapped: mmap.mmap, default_name: str) -> Iterator[tuple[str, bytearray]]:
+    # Kept apart from read_records so the array views of the mapping are released before it closes
+    data = np.frombuffer(mapped, dtype=np.uint8)
+    size = len(data)
+    position = 0
+    while position < size:
+        if data[position] == ord('>'):
+            end_of_line = mapped.find(b'\n', position)
+            if end_of_line == -1:
+                end_of_line = size
+            name = mapped[position + 1:end_of_line].decode().strip()
+            position = end_of_line + 1
+        else:
+            name = None
+
+        end = mapped.find(b'\n>', max(position - 1, 0))
+        if end == -1:
+            end = size
+        sequence = _strip(data[position:end])
+        if name is not None or sequence:
+            yield name or default_name, sequence
+        position = end + 1
+
+
+def _strip(text: np.ndarray) -> bytearray:
+    """text without whitespace, copied into a new bytearray"""
+    keep = text > ord(' ')
+    sequence = bytearray(int(np.count_nonzero(keep)))
+    np.compress(keep, text, out=np.frombuffer(sequence, dtype=np.uint8))
+    return sequence
+
+
+def read_fasta(file: Path | str) -> Iterator[tuple[str, str]]:
+    """
+    Yield (name, sequence) for each record of a FASTA file, one record at a time, with str sequences.
+    Line breaks are removed from the sequences; the name is the header line without '>'.
+    A file with no header is treated as a single record named after the file.
+    """
+    for name, sequence in read_records(file):
+        yield name, sequence.decode('ascii')
+
+
+def load_sequence(file: Path | str) -> bytearray:
+    """
+    The first sequence of a FASTA or plain sequence file, without line breaks.
+    align and the other alignment functions take the bytearray as is.
+    """
+    for _, sequence in read_records(file):
+        return sequence
+    return bytearray()
+
+
+def sequence_array(sequence: bytes | bytearray) -> np.ndarray:
+    """sequence as a uint8 array of its characters, sharing its memory"""
+    return np.frombuffer(sequence, dtype=np.uint8)
+
+
+def pack_2bit(sequence: bytes | bytearray) -> np.ndarray:
+    """
+    Pack a nucleotide sequence four bases to a byte (A, C, G, T = 0-3, first base in the low bits);
+    a quarter of the memory of the sequence itself. Use unpack_2bit to get the bases back.
+    """
+    codes = _TWO_BIT[sequence_array(sequence)]
+    if (codes == 255).any():
+        position = int(np.argmax(codes == 255))
+        raise ValueError(f'Only A, C, G and T can be 2-bit packed; found {chr(sequence[position])!r} at {position}')
+
+    quads = np.zeros(-(-len(codes) // 4) * 4, dtype=np.uint8)
+    quads[:len(codes)] = codes
+    quads = quads.reshape(-1, 4)
+    return quads[:, 0] | (quads[:, 1] << 2) | (quads[:, 2] << 4) | (quads[:, 3] << 6)
+
+
+def unpack_2bit(packed: np.ndarray, length: int) -> np.ndarray:
+    """The first length bases of a pack_2bit array, as a uint8 array of 'ACGT' characters"""
+    codes = (packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+    return np.frombuffer(_NUCLEOTIDES, dtype=np.uint8)[codes.reshape(-1)[:length]]
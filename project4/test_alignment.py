@@ -1,12 +1,18 @@
+import math
+import random
 from pathlib import Path
 
 from byu_pytest_utils import with_import, max_score, test_files
 
+import alignment
+from alignment import align, align_dict, align_linear_space, alignment_score, align_ops, apply_ops, cigar
+from scoring import ScoringScheme, linear_scheme, matrix_scheme
+from sequences import load_sequence
 from test_utils import timeout
 
 
-def read_sequence(file: Path) -> str:
-    return ''.join(file.read_text().splitlines())
+def read_sequence(file: Path) -> bytearray:
+    return load_sequence(file)
 
 
 @max_score(5)
@@ -113,3 +119,176 @@ def test_massive_dna_alignment_banded(align):
     assert score == -17380
     assert aseq1 == expected_align1
     assert aseq2 == expected_align2
+
+
+def random_sequence(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choice('ACGT') for _ in range(length))
+
+
+@max_score(5)
+def test_array_engine_matches_dict_engine():
+    rng = random.Random(312)
+    for _ in range(200):
+        seq1 = random_sequence(rng, rng.randint(1, 40))
+        seq2 = random_sequence(rng, rng.randint(1, 40))
+        for banded_width in [-1, 0, 1, 3, 50]:
+            if banded_width != -1 and abs(len(seq1) - len(seq2)) > banded_width:
+                continue
+            expected = align_dict(seq1, seq2, banded_width=banded_width)
+            assert align(seq1, seq2, banded_width=banded_width) == expected
+            assert align(seq1, seq2, banded_width=banded_width, backend='wavefront') == expected
+
+    assert align_dict('ACGT', 'AGT', match_award=-1, indel_penalty=2, sub_penalty=3) == \
+        align('ACGT', 'AGT', match_award=-1, indel_penalty=2, sub_penalty=3)
+
+
+@max_score(2)
+def test_wavefront_stores_only_matrix_cells():
+    # long enough for many blocks of diagonals; each one keeps only its own cells' directions
+    rng = random.Random(312)
+    seq1, seq2 = random_sequence(rng, 3000), random_sequence(rng, 2000)
+    assert align(seq1, seq2, backend='wavefront') == align(seq1, seq2)
+
+    scheme = linear_scheme()
+    _, traceback = alignment._fill_wavefront(scheme.encode(seq1), scheme.encode(seq2), scheme)
+    dirs = traceback.args[0]
+    assert dirs.nbytes <= 3001 * 2001 / 4 + 5001
+
+
+@max_score(2)
+def test_banded_alignment_out_of_band():
+    score, aseq1, aseq2 = align('ACGTACGT', 'ACG', banded_width=3)
+    assert score == math.inf
+    assert aseq1 is None
+    assert aseq2 is None
+
+
+def alignment_cost(aseq1: str, aseq2: str, gap='-') -> int:
+    return sum(5 if gap in (c1, c2) else -3 if c1 == c2 else 1 for c1, c2 in zip(aseq1, aseq2))
+
+
+@max_score(5)
+def test_linear_space_alignment(monkeypatch):
+    # Force several levels of divide and conquer on small inputs
+    monkeypatch.setattr(alignment, '_HIRSCHBERG_BASE_CELLS', 16)
+
+    rng = random.Random(312)
+    for _ in range(100):
+        seq1 = random_sequence(rng, rng.randint(0, 60))
+        seq2 = random_sequence(rng, rng.randint(0, 60))
+        score, aseq1, aseq2 = align_linear_space(seq1, seq2)
+
+        assert aseq1.replace('-', '') == seq1
+        assert aseq2.replace('-', '') == seq2
+        assert alignment_cost(aseq1, aseq2) == score
+        if seq1 and seq2:
+            assert score == align(seq1, seq2)[0]
+
+
+@max_score(3)
+def test_alignment_score_matches_align():
+    rng = random.Random(312)
+    for _ in range(100):
+        seq1 = random_sequence(rng, rng.randint(1, 40))
+        seq2 = random_sequence(rng, rng.randint(1, 40))
+        for banded_width in [-1, 0, 2, 50]:
+            if banded_width != -1 and abs(len(seq1) - len(seq2)) > banded_width:
+                assert alignment_score(seq1, seq2, banded_width=banded_width) == math.inf
+                continue
+            expected, _, _ = align(seq1, seq2, banded_width=banded_width)
+            assert alignment_score(seq1, seq2, banded_width=banded_width) == expected
+            assert align(seq1, seq2, banded_width=banded_width, score_only=True) == (expected, None, None)
+
+
+@max_score(5)
+def test_adaptive_band_matches_full_alignment(monkeypatch):
+    monkeypatch.setattr(alignment, '_ADAPTIVE_START_WIDTH', 1)
+
+    assert align('GGGGTTTTAAAACCCCTTTT', 'TTTTAAAACCCCTTTTGGGG', banded_width='adaptive') == \
+        (-8, 'GGGGTTTTAAAACCCCTTTT----', '----TTTTAAAACCCCTTTTGGGG')
+
+    rng = random.Random(312)
+    for _ in range(200):
+        seq1 = random_sequence(rng, rng.randint(1, 50))
+        # Mostly similar pairs, so the band often suffices before covering the matrix
+        seq2 = ''.join(c if rng.random() > 0.1 else random_sequence(rng, rng.randint(0, 2)) for c in seq1) or 'A'
+        for scoring in [{}, {'match_award': -1, 'indel_penalty': 2, 'sub_penalty': 3}]:
+            expected = align(seq1, seq2, **scoring)
+            assert align(seq1, seq2, banded_width='adaptive', **scoring) == expected
+            assert alignment_score(seq1, seq2, banded_width='adaptive', **scoring) == expected[0]
+
+
+@max_score(3)
+def test_edit_operations():
+    score, ops = align_ops('polynomial', 'exponential')
+    assert score == -1
+    assert ops == 'MMMMMDMMMMM'
+    assert apply_ops(ops, 'polynomial', 'exponential') == ('polyn-omial', 'exponential')
+    assert cigar(ops) == '5M1D5M'
+
+    score, ops = align_ops('GGGGTTTTAAAACCCCTTTT', 'TTTTAAAACCCCTTTTGGGG')
+    assert cigar(ops) == '4I16M4D'
+    assert cigar('') == ''
+
+
+def gotoh_cost(seq1: str, seq2: str, scheme: ScoringScheme) -> int:
+    """Affine-gap cost by the textbook three-matrix recurrence"""
+    a, b = scheme.encode(seq1), scheme.encode(seq2)
+    gap_open, gap_extend = scheme.gap_open, scheme.gap_extend
+    best = [[0] + [gap_open + j * gap_extend for j in range(1, len(b) + 1)]]
+    up_gap = [[math.inf] * (len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        best.append([gap_open + i * gap_extend])
+        up_gap.append([math.inf])
+        left_gap = math.inf
+        for j in range(1, len(b) + 1):
+            left_gap = min(left_gap + gap_extend, best[i][j - 1] + gap_open + gap_extend)
+            up_gap[i].append(min(up_gap[i - 1][j] + gap_extend, best[i - 1][j] + gap_open + gap_extend))
+            diagonal = best[i - 1][j - 1] + int(scheme.substitution(a[i - 1], b[j - 1]))
+            best[i].append(min(diagonal, left_gap, up_gap[i][j]))
+    return best[-1][-1]
+
+
+def ops_cost(ops: str, seq1: str, seq2: str, scheme: ScoringScheme) -> int:
+    a, b = iter(scheme.encode(seq1)), iter(scheme.encode(seq2))
+    cost = 0
+    for k, op in enumerate(ops):
+        if op == 'M':
+            cost += int(scheme.substitution(next(a), next(b)))
+        else:
+            next(a if op == 'I' else b)
+            cost += scheme.gap_extend + (scheme.gap_open if k == 0 or ops[k - 1] != op else 0)
+    return cost
+
+
+@max_score(5)
+def test_affine_gaps_match_gotoh():
+    rng = random.Random(312)
+    for _ in range(200):
+        matrix = rng.choice(['NUC.4.4', 'BLOSUM62'])
+        alphabet = 'ACGT' if matrix == 'NUC.4.4' else 'ARNDCQEGHILKMFPSTWYV'
+        seq1 = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        seq2 = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        scheme = matrix_scheme(matrix, rng.randint(1, 12), rng.randint(0, 3))
+
+        expected = gotoh_cost(seq1, seq2, scheme)
+        score, ops = align_ops(seq1, seq2, scheme=scheme)
+        assert score == expected
+        assert ops_cost(ops, seq1, seq2, scheme) == expected
+        assert alignment_score(seq1, seq2, scheme=scheme) == expected
+        assert align_ops(seq1, seq2, scheme=scheme, banded_width='adaptive') == (score, ops)
+
+
+@max_score(3)
+def test_scoring_schemes():
+    blosum = matrix_scheme('BLOSUM62', 11, 1)
+    assert blosum is matrix_scheme('BLOSUM62', 11, 1)
+    assert (blosum.table == blosum.table.T).all()
+    assert blosum.substitution(*blosum.encode('WW')) == -11
+    assert blosum.substitution(*blosum.encode('aw')) == 3
+
+    # With no gap_open, a matrix reproducing align's costs gives align's results
+    costs = {(c1, c2): -3 if c1 == c2 else 1 for c1 in 'ACGT' for c2 in 'ACGT'}
+    scheme = ScoringScheme(0, 5, costs=costs)
+    assert align('ATGCATGC', 'ATGGTGC', scheme=scheme) == align('ATGCATGC', 'ATGGTGC')
+    assert linear_scheme() is linear_scheme()
@@ -0,0 +1,45 @@
+import io
+import json
+import random
+
+from byu_pytest_utils import max_score
+
+import batch
+from alignment import align
+from batch import align_many, write_json_lines
+
+
+def random_pairs(count: int) -> list[tuple[str, str]]:
+    rng = random.Random(312)
+    return [
+        (''.join(rng.choice('ACGT') for _ in range(rng.randint(1, 80))),
+         ''.join(rng.choice('ACGT') for _ in range(rng.randint(1, 80))))
+        for _ in range(count)
+    ]
+
+
+@max_score(5)
+def test_align_many_in_order(monkeypatch):
+    # Small chunks so the pairs are spread over several workers
+    monkeypatch.setattr(batch, 'CHUNK_CELLS', 2000)
+
+    pairs = random_pairs(60)
+    expected = [align(seq1, seq2, banded_width=5) for seq1, seq2 in pairs]
+
+    assert list(align_many(pairs, workers=3, banded_width=5)) == expected
+    assert list(align_many(pairs, workers=1, banded_width=5)) == expected
+
+    expected = [align(seq1, seq2, banded_width='adaptive') for seq1, seq2 in pairs]
+    assert list(align_many(pairs, workers=2, banded_width='adaptive')) == expected
+
+
+@max_score(2)
+def test_json_lines():
+    out = io.StringIO()
+    write_json_lines([('a', 'polynomial', 'exponential'), ('b', 'ATGCATGC', 'ATGGTGC')], out, workers=2)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert records == [
+        {'name': 'a', 'score': -1, 'alignment1': 'polyn-omial', 'alignment2': 'exponential'},
+        {'name': 'b', 'score': -12, 'alignment1': 'ATGCATGC', 'alignment2': 'ATG-GTGC'},
+    ]
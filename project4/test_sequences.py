@@ -0,0 +1,31 @@
+from byu_pytest_utils import max_score
+
+from alignment import align
+from sequences import load_sequence, pack_2bit, read_fasta, read_records, unpack_2bit
+
+
+@max_score(3)
+def test_read_records(tmp_path):
+    fasta = tmp_path / 'records.fa'
+    fasta.write_text('>one first record\nACGT\nAC\r\n\n>empty\n>three\nGG\nT')
+    assert list(read_records(fasta)) == [('one first record', b'ACGTAC'), ('empty', b''), ('three', b'GGT')]
+    assert list(read_fasta(fasta)) == [('one first record', 'ACGTAC'), ('empty', ''), ('three', 'GGT')]
+
+    plain = tmp_path / 'plain.txt'
+    plain.write_text('polyn\nomial\n')
+    assert list(read_records(plain)) == [('plain', b'polynomial')]
+    assert align(load_sequence(plain), 'exponential') == align('polynomial', 'exponential')
+
+    empty = tmp_path / 'empty.txt'
+    empty.write_text('')
+    assert list(read_records(empty)) == []
+    assert load_sequence(empty) == b''
+
+
+@max_score(2)
+def test_2bit_packing():
+    sequence = b'ACGTTGCAAc'
+    packed = pack_2bit(sequence)
+    assert len(packed) == 3
+    assert bytes(unpack_2bit(packed, len(sequence))) == sequence.upper()
+    assert align(unpack_2bit(packed, 9), b'ATGGTGC') == align('ACGTTGCAA', 'ATGGTGC')